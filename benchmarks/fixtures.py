@@ -0,0 +1,181 @@
+import json
+import random
+from datetime import datetime, timedelta
+
+# Synthetic payloads shaped like the real sources (Graph API comments,
+# Places API details, Traveloka review cards / embedded state). Everything
+# is generated lazily and deterministically from the item index, so 1M-item
+# runs do not need the whole fixture in memory and reruns see the same data.
+
+SIZES = (10, 10_000, 1_000_000)
+
+ID_SENTENCES = [
+    "Kamar bersih dan pelayanan sangat ramah, pasti akan kembali lagi",
+    "Makanan enak tapi harga agak mahal untuk ukuran hotel ini",
+    "Tempat nyaman dan dekat dengan pusat kota, recommended banget",
+    "Sarapan kurang variatif tapi staf sangat membantu dan sopan",
+    "AC di kamar tidak dingin, tapi overall masih oke untuk semalam",
+    "Lokasi strategis dan kamar luas, cuma parkir agak sempit sih",
+]
+
+# fixed pool: every English text is pre-seeded in the translation cache,
+# so the Google stage never reaches googletrans
+EN_SENTENCES = [
+    "The room was clean and the staff were very friendly",
+    "Great location but the breakfast was not very good",
+    "Nice place to stay, would come back again with my family",
+    "The pool was too small and the wifi was really slow",
+]
+
+EN_TRANSLATIONS = {
+    EN_SENTENCES[0]: "Kamarnya bersih dan stafnya sangat ramah",
+    EN_SENTENCES[1]: "Lokasi bagus tapi sarapannya kurang enak",
+    EN_SENTENCES[2]: "Tempat yang bagus untuk menginap, akan kembali bersama keluarga",
+    EN_SENTENCES[3]: "Kolamnya terlalu kecil dan wifinya sangat lambat",
+}
+
+AUTHORS = ["Budi", "Siti", "Andi", "Dewi", "Rina", "Agus", "Maya", "John", "Emily", "Kenji"]
+
+BASE_TIME = datetime(2024, 1, 1, 8, 0, 0)
+
+
+def _rng(i):
+    return random.Random(i)
+
+
+def review_text(i, english_ratio=0.0):
+    rng = _rng(i)
+    if rng.random() < english_ratio:
+        return rng.choice(EN_SENTENCES)
+    return f"{rng.choice(ID_SENTENCES)}. {rng.choice(ID_SENTENCES)} #{i}"
+
+
+def author(i):
+    return f"{AUTHORS[i % len(AUTHORS)]} {i}"
+
+
+# ---------------------------------------------------------------------
+# FACEBOOK (Graph API)
+# ---------------------------------------------------------------------
+def graph_comment(i, post_id):
+    created = BASE_TIME + timedelta(minutes=i)
+    return {
+        "id": f"{post_id}_{i}",
+        "message": review_text(i),
+        "from": {"name": author(i), "id": str(10_000_000 + i)},
+        "created_time": created.strftime("%Y-%m-%dT%H:%M:%S+0000"),
+    }
+
+
+def facebook_pages(n, comments_per_post=500, page_size=100):
+    """Yields (post, comments) pages, the contract of FacebookAPI.iter_facebook_comments"""
+    for post_start in range(0, n, comments_per_post):
+        post_id = f"123456789_{post_start // comments_per_post}"
+        post = {
+            "post_id": post_id,
+            "created_time": BASE_TIME.strftime("%Y-%m-%dT%H:%M:%S+0000"),
+            "message": f"Promo kamar minggu ini #{post_start}",
+        }
+        post_end = min(post_start + comments_per_post, n)
+        for page_start in range(post_start, post_end, page_size):
+            page_end = min(page_start + page_size, post_end)
+            yield post, [graph_comment(i, post_id) for i in range(page_start, page_end)]
+
+
+# ---------------------------------------------------------------------
+# GOOGLE (Places API details -> result.reviews[])
+# ---------------------------------------------------------------------
+def places_review(i, english_ratio=0.3):
+    rng = _rng(i)
+    return {
+        "author_name": author(i),
+        "author_url": f"https://www.google.com/maps/contrib/{100_000_000 + i}",
+        "language": "en" if rng.random() < english_ratio else "id",
+        "profile_photo_url": f"https://lh3.googleusercontent.com/a/{i}",
+        "rating": rng.randint(1, 5),
+        "relative_time_description": "2 minggu lalu",
+        "text": review_text(i, english_ratio),
+        "time": int((BASE_TIME + timedelta(minutes=i)).timestamp()),
+    }
+
+
+def places_reviews(n, english_ratio=0.3):
+    for i in range(n):
+        yield places_review(i, english_ratio)
+
+
+# ---------------------------------------------------------------------
+# TRAVELOKA (EXTRACT_REVIEWS_SCRIPT items, embedded page state)
+# ---------------------------------------------------------------------
+def traveloka_item(i):
+    """One review card as returned by channels.traveloka.EXTRACT_REVIEWS_SCRIPT"""
+    rng = _rng(i)
+    return {
+        "author_name": author(i),
+        "content": review_text(i),
+        "rating_text": f"{rng.randint(60, 100) / 10:.1f}".replace(".", ","),
+        "date_text": f"Reviewed {rng.randint(1, 11)} weeks ago",
+    }
+
+
+def traveloka_items(n):
+    for i in range(n):
+        yield traveloka_item(i)
+
+
+def traveloka_record(i):
+    """One review object as found in Traveloka JSON (XHR payload / __NEXT_DATA__)"""
+    rng = _rng(i)
+    return {
+        "reviewId": str(900_000_000 + i),
+        "reviewerName": author(i),
+        "reviewText": review_text(i),
+        "overallScore": rng.randint(60, 100) / 10,
+        "reviewTime": int((BASE_TIME + timedelta(minutes=i)).timestamp() * 1000),
+    }
+
+
+def traveloka_html_pages(n, per_page=100):
+    """Hotel pages with reviews embedded in __NEXT_DATA__, per_page reviews each"""
+    for start in range(0, n, per_page):
+        state = {
+            "props": {
+                "pageProps": {
+                    "hotel": {"id": "1000012345", "name": "Hotel Benchmark"},
+                    "reviews": {"list": [traveloka_record(i) for i in range(start, min(start + per_page, n))]},
+                }
+            }
+        }
+        yield (
+            "<html><head><meta property=\"og:title\" content=\"Hotel Benchmark\"></head><body>"
+            "<h1>Hotel Benchmark</h1>"
+            f"<script id=\"__NEXT_DATA__\" type=\"application/json\">{json.dumps(state)}</script>"
+            "</body></html>"
+        )
+
+
+# ---------------------------------------------------------------------
+# RAW_FEEDBACK ROWS (input of utils.db.upsert_raw_feedback)
+# ---------------------------------------------------------------------
+def feedback_row(i, channel_id):
+    comment = graph_comment(i, "123456789_0")
+    return {
+        "channel_id": channel_id,
+        "external_id": comment["id"],
+        "author_name": comment["from"]["name"],
+        "rating": None,
+        "content": comment["message"],
+        "source_url": "https://facebook.com/123456789_0",
+        "review_created_at": BASE_TIME + timedelta(minutes=i),
+        "metadata": {
+            "source": "facebook",
+            "comment_id": comment["id"],
+            "post_id": "123456789_0",
+            "original_data": comment,
+        },
+    }
+
+
+def feedback_rows(n, channel_id):
+    for i in range(n):
+        yield feedback_row(i, channel_id)
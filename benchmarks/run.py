@@ -0,0 +1,312 @@
+"""
+Offline benchmark suite for the ingestion hot paths. No live API, browser
+session or MySQL server is used: fixtures come from benchmarks.fixtures and
+the write path runs on benchmarks.sqlite_adapter.
+
+Every (stage, size) runs in its own subprocess, so peak RSS is per stage.
+
+    python -m benchmarks.run                                  # all stages, 10 and 10k items
+    python -m benchmarks.run --sizes 10,10000,1000000         # include the 1M run
+    python -m benchmarks.run --stages db_upsert,db_upsert_rerun
+    python -m benchmarks.run --save-baseline                  # write benchmarks/baselines/local.json
+    python -m benchmarks.run --compare                        # exit 1 if slower than the baseline
+
+Stages that work on batches (db_upsert*, traveloka_http_parse) report the
+per-item latency as batch time / batch size.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(ROOT, "benchmarks", "baselines", "local.json")
+DEFAULT_SIZES = "10,10000"
+DB_BENCH_BATCH = 500
+
+
+# ---------------------------------------------------------------------
+# STAGES (run inside the worker process)
+# ---------------------------------------------------------------------
+def bench_facebook_transform(n):
+    from benchmarks import fixtures
+    from ingestion.ingest_facebook import FacebookIngestor
+
+    ingestor = FacebookIngestor()
+    latencies = []
+    for post, comments in fixtures.facebook_pages(n):
+        for comment in comments:
+            started = time.perf_counter()
+            ingestor._transform_comment(comment, post["post_id"], post["message"], 1)
+            latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def bench_google_process(n):
+    from benchmarks import fixtures
+    from channels import google_maps
+
+    # English fixtures resolve from the cache, Indonesian ones locally: no googletrans call
+    for text, translated in fixtures.EN_TRANSLATIONS.items():
+        google_maps.translation_cache.set(text, "en", translated)
+
+    latencies = []
+    for review in fixtures.places_reviews(n):
+        started = time.perf_counter()
+        google_maps.process_google_reviews([review])
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def bench_traveloka_process(n):
+    from benchmarks import fixtures
+    from channels.traveloka import process_reviews
+
+    collected_reviews, reviews_data = set(), []
+    latencies = []
+    for item in fixtures.traveloka_items(n):
+        started = time.perf_counter()
+        process_reviews([item], collected_reviews, reviews_data)
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def bench_traveloka_http_parse(n):
+    from benchmarks import fixtures
+    from channels.traveloka_http import collect_reviews, extract_embedded_state
+    from channels.traveloka_payload import find_review_records
+
+    collected_reviews, reviews_data = set(), []
+    latencies = []
+    for page_html in fixtures.traveloka_html_pages(n):
+        started = time.perf_counter()
+        added = 0
+        for state in extract_embedded_state(page_html):
+            added += collect_reviews(find_review_records(state), collected_reviews, reviews_data, "http-embedded")[0]
+        elapsed = time.perf_counter() - started
+        latencies.extend([elapsed / max(added, 1)] * added)
+    return latencies
+
+
+def _db_pass(conn, channel_id, n):
+    from benchmarks import fixtures
+    from utils.db import upsert_raw_feedback
+
+    latencies = []
+    chunk = []
+    for row in fixtures.feedback_rows(n, channel_id):
+        chunk.append(row)
+        if len(chunk) >= DB_BENCH_BATCH:
+            latencies.extend(_timed_upsert(upsert_raw_feedback, conn, chunk))
+            chunk = []
+    if chunk:
+        latencies.extend(_timed_upsert(upsert_raw_feedback, conn, chunk))
+    return latencies
+
+
+def _timed_upsert(upsert, conn, chunk):
+    started = time.perf_counter()
+    upsert(conn, chunk, batch_size=DB_BENCH_BATCH)
+    elapsed = time.perf_counter() - started
+    return [elapsed / len(chunk)] * len(chunk)
+
+
+def _db_setup(workdir):
+    from benchmarks.sqlite_adapter import SQLiteConnection
+    from utils.db import get_or_create_channel
+
+    conn = SQLiteConnection(os.path.join(workdir, "bench.sqlite3"))
+    return conn, get_or_create_channel(conn, name="Benchmark", type_="api", base_url=None)
+
+
+def bench_db_upsert(n, workdir):
+    """First write of n rows: every row is new"""
+    conn, channel_id = _db_setup(workdir)
+    try:
+        return _db_pass(conn, channel_id, n)
+    finally:
+        conn.close()
+
+
+def bench_db_upsert_rerun(n, workdir):
+    """Same n rows written again: every row is unchanged (fingerprint path)"""
+    conn, channel_id = _db_setup(workdir)
+    try:
+        _db_pass(conn, channel_id, n)
+        return _db_pass(conn, channel_id, n)
+    finally:
+        conn.close()
+
+
+STAGES = {
+    "facebook_transform": bench_facebook_transform,
+    "google_process": bench_google_process,
+    "traveloka_process": bench_traveloka_process,
+    "traveloka_http_parse": bench_traveloka_http_parse,
+    "db_upsert": bench_db_upsert,
+    "db_upsert_rerun": bench_db_upsert_rerun,
+}
+DB_STAGES = ("db_upsert", "db_upsert_rerun")
+
+
+# ---------------------------------------------------------------------
+# WORKER
+# ---------------------------------------------------------------------
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(int(round(q * (len(sorted_values) - 1))), len(sorted_values) - 1)]
+
+
+def peak_rss_mb():
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def run_worker(stage, size):
+    """Run one stage in this process and print its result as one JSON line"""
+    result = {"stage": stage, "size": size}
+    with tempfile.TemporaryDirectory(prefix="ingestion-bench-") as workdir:
+        # must be set before config.settings is imported
+        os.environ["TRANSLATION_CACHE_PATH"] = os.path.join(workdir, "translations.sqlite3")
+        os.environ.setdefault("LOG_LEVEL", "WARNING")
+        os.environ.setdefault("METRICS_JSON_PATH", "")
+        os.environ.setdefault("METRICS_PROM_PATH", "")
+        sys.path.insert(0, ROOT)
+
+        bench = STAGES[stage]
+        try:
+            started = time.perf_counter()
+            latencies = bench(size, workdir) if stage in DB_STAGES else bench(size)
+            wall = time.perf_counter() - started
+        except ImportError as e:
+            result["skipped"] = f"missing dependency: {e.name or e}"
+            print(json.dumps(result))
+            return
+
+    latencies.sort()
+    busy = sum(latencies)
+    result.update({
+        "items": len(latencies),
+        "wall_seconds": round(wall, 4),
+        "throughput": round(len(latencies) / busy, 1) if busy else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 4),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 4),
+        "peak_rss_mb": peak_rss_mb(),
+    })
+    print(json.dumps(result))
+
+
+# ---------------------------------------------------------------------
+# RUNNER
+# ---------------------------------------------------------------------
+def run_stage(stage, size):
+    completed = subprocess.run(
+        [sys.executable, "-m", "benchmarks.run", "--worker", stage, str(size)],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    lines = [line for line in completed.stdout.splitlines() if line.startswith("{")]
+    if completed.returncode != 0 or not lines:
+        error_tail = (completed.stderr or completed.stdout).strip().splitlines()[-1:] or ["no output"]
+        return {"stage": stage, "size": size, "error": error_tail[0]}
+    return json.loads(lines[-1])
+
+
+def key_of(result):
+    return f"{result['stage']}@{result['size']}"
+
+
+def compare(results, baseline, threshold):
+    """Regression = throughput down, or p99 / peak RSS up, by more than threshold"""
+    base = {key_of(r): r for r in baseline.get("results", []) if "items" in r}
+    regressions = []
+    for r in results:
+        old = base.get(key_of(r))
+        if not old or "items" not in r:
+            continue
+        checks = [
+            ("throughput", r["throughput"] < old["throughput"] * (1 - threshold)),
+            ("p99_ms", r["p99_ms"] > old["p99_ms"] * (1 + threshold)),
+            ("peak_rss_mb", r["peak_rss_mb"] > old["peak_rss_mb"] * (1 + threshold)),
+        ]
+        for metric, regressed in checks:
+            if regressed:
+                regressions.append(f"{key_of(r)} {metric}: {old[metric]} -> {r[metric]}")
+    return regressions
+
+
+def print_table(results):
+    print(f"\n{'stage':<22} {'size':>9} {'items/s':>12} {'p50 ms':>10} {'p99 ms':>10} {'RSS MB':>8}")
+    for r in results:
+        if "items" in r:
+            print(f"{r['stage']:<22} {r['size']:>9} {r['throughput']:>12} {r['p50_ms']:>10} "
+                  f"{r['p99_ms']:>10} {r['peak_rss_mb']:>8}")
+        else:
+            print(f"{r['stage']:<22} {r['size']:>9}  {r.get('skipped') or 'ERROR: ' + r.get('error', '?')}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline ingestion benchmarks")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="comma list of item counts")
+    parser.add_argument("--stages", default=",".join(STAGES), help="comma list of stages")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline JSON path")
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the baseline")
+    parser.add_argument("--compare", action="store_true", help="compare with the baseline, exit 1 on regression")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed relative slowdown (0.2 = 20%%)")
+    parser.add_argument("--worker", nargs=2, metavar=("STAGE", "SIZE"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        run_worker(args.worker[0], int(args.worker[1]))
+        return 0
+
+    stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+    unknown = [s for s in stages if s not in STAGES]
+    if unknown:
+        parser.error(f"unknown stages: {', '.join(unknown)} (available: {', '.join(STAGES)})")
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+
+    results = []
+    for stage in stages:
+        for size in sizes:
+            print(f"▶ {stage} ({size} items)...", flush=True)
+            results.append(run_stage(stage, size))
+    print_table(results)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({
+                "created_at": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "results": results,
+            }, f, indent=2)
+        print(f"\n💾 Baseline saved: {args.baseline}")
+
+    if args.compare:
+        try:
+            with open(args.baseline, encoding="utf-8") as f:
+                baseline = json.load(f)
+        except FileNotFoundError:
+            print(f"\n⚠ No baseline at {args.baseline}, run with --save-baseline first")
+            return 1
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) vs baseline ({baseline.get('created_at')}):")
+            for line in regressions:
+                print(f"   {line}")
+            return 1
+        print(f"\n✅ No regressions vs baseline ({baseline.get('created_at')})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+import re
+import sqlite3
+from datetime import date, datetime
+from decimal import Decimal
+from functools import lru_cache
+
+# Just enough of the pymysql connection/cursor surface used by utils.db and
+# utils.dedup (DictCursor rows, %s params, begin/commit/rollback, MySQL
+# upsert syntax) on top of sqlite3, so the write path can be benchmarked
+# without a MySQL server. Timings are relative: compare runs against the
+# same adapter, not against production MySQL.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS channels (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT UNIQUE,
+    type TEXT,
+    base_url TEXT,
+    last_ingested_at TEXT
+);
+CREATE TABLE IF NOT EXISTS raw_feedback (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    channel_id INTEGER NOT NULL,
+    external_id TEXT,
+    author_name TEXT,
+    rating REAL,
+    content TEXT,
+    source_url TEXT,
+    review_created_at TEXT,
+    metadata TEXT,
+    fingerprint TEXT,
+    review_updated_at TEXT,
+    UNIQUE (channel_id, external_id)
+);
+CREATE INDEX IF NOT EXISTS idx_raw_feedback_author ON raw_feedback (channel_id, author_name);
+"""
+
+sqlite3.register_adapter(datetime, lambda v: v.isoformat(sep=" "))
+sqlite3.register_adapter(date, lambda v: v.isoformat())
+sqlite3.register_adapter(Decimal, float)
+
+UPSERT_RE = re.compile(r"ON\s+DUPLICATE\s+KEY\s+UPDATE(.*)$", re.S | re.I)
+VALUES_RE = re.compile(r"VALUES\((\w+)\)")
+LEFT_RE = re.compile(r"LEFT\(\s*(\w+)\s*,", re.I)
+
+
+@lru_cache(maxsize=256)
+def translate(sql):
+    """MySQL statement as written in utils.db / utils.dedup -> SQLite"""
+    match = UPSERT_RE.search(sql)
+    if match:
+        assignments = VALUES_RE.sub(r"excluded.\1", match.group(1))
+        sql = sql[:match.start()] + "ON CONFLICT (channel_id, external_id) DO UPDATE SET" + assignments
+    sql = LEFT_RE.sub(r"substr(\1, 1,", sql)
+    sql = sql.replace("NOW()", "CURRENT_TIMESTAMP")
+    return sql.replace("%s", "?")
+
+
+class SQLiteCursor:
+    def __init__(self, conn):
+        self._cur = conn.cursor()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._cur.close()
+
+    def __iter__(self):
+        return (dict(row) for row in self._cur)
+
+    def execute(self, sql, params=()):
+        self._cur.execute(translate(sql), tuple(params or ()))
+        return self._cur.rowcount
+
+    def executemany(self, sql, rows):
+        self._cur.executemany(translate(sql), rows)
+        return self._cur.rowcount
+
+    def fetchone(self):
+        row = self._cur.fetchone()
+        return dict(row) if row is not None else None
+
+    def fetchall(self):
+        return [dict(row) for row in self._cur.fetchall()]
+
+    @property
+    def rowcount(self):
+        return self._cur.rowcount
+
+
+class SQLiteConnection:
+    """pymysql.Connection stand-in (autocommit, explicit begin() for chunk transactions)"""
+    def __init__(self, path=":memory:"):
+        self._conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def cursor(self, cursor_class=None):
+        # cursor_class (DictCursor / SSDictCursor) is ignored: rows are always dicts
+        return SQLiteCursor(self._conn)
+
+    def begin(self):
+        self._conn.execute("BEGIN")
+
+    def commit(self):
+        if self._conn.in_transaction:
+            self._conn.execute("COMMIT")
+
+    def rollback(self):
+        if self._conn.in_transaction:
+            self._conn.execute("ROLLBACK")
+
+    def ping(self, reconnect=False):
+        return True
+
+    def close(self):
+        self._conn.close()
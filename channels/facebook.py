@@ -1,16 +1,27 @@
 # filename: channel/facebook.py
+import queue
+import threading
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from dotenv import load_dotenv
 from utils.logger import info, error
-from config.settings import FB_BASE_URL, FB_PAGE_ID, FB_ACCESS_TOKEN
+from utils.metrics import timer, incr
+from utils.landing import land
+from utils.http_client import get_client
+from config.settings import FB_BASE_URL, FB_PAGE_ID, FB_ACCESS_TOKEN, FB_FETCH_CONCURRENCY, FB_EXPAND_COMMENTS
 
 load_dotenv()
 
+COMMENT_FIELDS = "id,message,from,created_time"
+
 class FacebookAPI:
     def __init__(self):
         self.page_id = FB_PAGE_ID
         self.access_token = FB_ACCESS_TOKEN
         self.base_url = FB_BASE_URL or "https://graph.facebook.com/v24.0"
+        # rate limit + retry dipakai bersama semua thread fetch
+        self.http = get_client("facebook")
 
     def _mask_token(self, token):
         if not token:
@@ -32,101 +43,247 @@ class FacebookAPI:
             default_params.update(params)
         info(f"🌐 Facebook API Request: {endpoint} params={params}")
         try:
-            response = requests.get(url, params=default_params, timeout=15)
-            response.raise_for_status()
-            return response.json()
+            with timer("http_fetch", channel="facebook"):
+                response = self.http.get(url, params=default_params)
+                response.raise_for_status()
+                return response.json()
         except requests.RequestException as e:
             error(f"❌ Facebook API Error: {e} (endpoint={endpoint})")
             return None
 
-    def fetch_latest_posts(self, limit=3):
+    def _since_param(self, since):
+        # cutoff is aware UTC (utils.db.get_channel_watermark); naive = app local time
+        return int(since.timestamp()) if since else None
+
+    def fetch_latest_posts(self, limit=3, expand_comments=False, comments_limit=100, since=None):
         """
         Fetch latest posts from the page with important fields.
+        expand_comments=True uses nested field expansion so every post already
+        carries its first page of comments under post["comments"].
+        since (datetime) limits posts and expanded comments to those created after it.
         """
         if not self._validate_credentials():
             return []
+        since_ts = self._since_param(since)
+        fields = "id,message,created_time"
+        if expand_comments:
+            since_modifier = f".since({since_ts})" if since_ts else ""
+            fields += f",comments{since_modifier}.limit({comments_limit}){{{COMMENT_FIELDS}}}"
         params = {
             "limit": limit,
-            "fields": "id,message,created_time"
+            "fields": fields
         }
+        if since_ts:
+            params["since"] = since_ts
         result = self._make_api_request(f"{self.page_id}/posts", params)
         return result.get("data", []) if result else []
 
-    def fetch_post_comments(self, post_id, limit=100):
+    def fetch_post_comments(self, post_id, limit=100, since=None):
         """
         Fetch all comments for a post, handling pagination.
         Returns a flat list of comment objects (each is a dict).
+        since (datetime) only returns comments created after it.
+        """
+        return [c for page in self.iter_post_comments(post_id, limit=limit, since=since) for c in page]
+
+    def iter_post_comments(self, post_id, limit=100, since=None, errors=None):
+        """
+        Generator version of fetch_post_comments: yields one page (list of comments) at a time.
+        errors (list): fetch/pagination failures are appended here, so the caller
+        knows the stream is incomplete (see _record_fetch_error).
         """
         if not self._validate_credentials():
-            return []
+            return
 
-        comments = []
         params = {
             "limit": limit,
-            "fields": "id,message,from,created_time"
+            "fields": COMMENT_FIELDS
         }
+        since_ts = self._since_param(since)
+        if since_ts:
+            params["since"] = since_ts
 
         # initial request
         result = self._make_api_request(f"{post_id}/comments", params)
-        if not result:
-            return comments
+        if result is None:
+            self._record_fetch_error(errors, f"comments of post {post_id}")
+        elif result:
+            yield from self._iter_comment_pages(result, errors)
+
+    def _record_fetch_error(self, errors, what):
+        # list.append is atomic, worker threads share one errors list
+        if errors is not None:
+            errors.append(what)
 
-        # collect data and follow paging.next
+    def _iter_comment_pages(self, result, errors=None):
+        """
+        Yield the comments of a comments page (edge response or the nested
+        post["comments"] object), then follow paging.next until exhausted.
+        Only the current page is kept in memory.
+        """
         try:
             while result:
                 data = result.get("data", [])
+                next_url = result.get("paging", {}).get("next")
+                result = None
                 if data:
-                    comments.extend(data)
-
-                paging = result.get("paging", {})
-                next_url = paging.get("next")
+                    incr("comment_pages", channel="facebook")
+                    incr("items_fetched", len(data), channel="facebook")
+                    yield data
                 if not next_url:
                     break
 
                 # follow next page URL (it usually already includes access_token)
                 try:
                     info(f"🌐 Fetching next page of comments: {next_url}")
-                    r = requests.get(next_url, timeout=15)
-                    r.raise_for_status()
-                    result = r.json()
+                    with timer("pagination", channel="facebook"):
+                        r = self.http.get(next_url)
+                        r.raise_for_status()
+                        result = r.json()
                 except Exception as e:
                     error(f"❌ Error fetching next page: {e}")
+                    self._record_fetch_error(errors, next_url)
                     break
 
         except Exception as e:
             error(f"❌ Error during comments pagination: {e}")
+            self._record_fetch_error(errors, "comments pagination")
+
+    def _collect_comment_pages(self, result):
+        """All comments of _iter_comment_pages as one flat list"""
+        return [c for page in self._iter_comment_pages(result) for c in page]
+
+    def _iter_post_comment_pages(self, post, expanded=False, since=None, errors=None):
+        """Comment pages of one post; each page is landed as-is before it is yielded"""
+        header = self._post_header(post)
+        if "comments" in post:
+            # expanded: first page is embedded, only paginate when there is more
+            pages = self._iter_comment_pages(post.pop("comments"), errors)
+        elif not expanded:
+            pages = self.iter_post_comments(post.get("id"), since=since, errors=errors)
+        else:
+            # expanded fetch and no "comments" key means the post has no comments
+            return
+        for page in pages:
+            land("facebook", "comments_page", page, post=header)
+            yield page
+
+    def _post_header(self, post):
+        return {
+            "post_id": post.get("id"),
+            "created_time": post.get("created_time"),
+            "message": post.get("message", ""),
+        }
 
-        return comments
+    def _build_post_entry(self, post, expanded=False, since=None):
+        entry = self._post_header(post)
+        entry["comments"] = [c for page in self._iter_post_comment_pages(post, expanded, since) for c in page]
+        return entry
 
-    def fetch_facebook_data(self, limit=3):
+    def fetch_facebook_data(self, limit=3, concurrency=FB_FETCH_CONCURRENCY, expand_comments=FB_EXPAND_COMMENTS, since=None):
         """
         Fetch posts + comments structured for ingestion.
+        concurrency > 1 fetches comments of several posts in parallel
+        (each post still follows its own paging.next); output order follows posts.
+        expand_comments=True gets posts and their first comment page in one request.
+        since (datetime) is the incremental watermark passed to posts and comments.
         """
         info("🚀 Starting Facebook data fetch...")
-        posts = self.fetch_latest_posts(limit)
+        posts = self.fetch_latest_posts(limit, expand_comments=expand_comments, since=since)
         if not posts:
             error("❌ No posts fetched from Facebook")
             return []
 
-        structured_data = []
-        for post in posts:
-            post_id = post.get("id")
-            if not post_id:
-                continue
-            comments = self.fetch_post_comments(post_id)
-            structured_data.append({
-                "post_id": post_id,
-                "created_time": post.get("created_time"),
-                "message": post.get("message", ""),
-                "comments": comments
-            })
+        posts = [post for post in posts if post.get("id")]
+        build_entry = partial(self._build_post_entry, expanded=expand_comments, since=since)
+        workers = min(max(int(concurrency or 1), 1), len(posts) or 1)
+        if workers > 1:
+            info(f"⚡ Fetching comments for {len(posts)} posts with {workers} workers")
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                structured_data = list(executor.map(build_entry, posts))
+        else:
+            structured_data = [build_entry(post) for post in posts]
 
         info(f"✅ Facebook data fetch completed: {len(structured_data)} posts with comments")
         return structured_data
 
+    def iter_facebook_comments(self, limit=3, concurrency=FB_FETCH_CONCURRENCY, expand_comments=FB_EXPAND_COMMENTS,
+                               since=None, errors=None):
+        """
+        Streaming version of fetch_facebook_data: yields (post, comments) one
+        comments page at a time, post = {"post_id", "created_time", "message"}.
+        concurrency > 1 paginates several posts in worker threads that feed a
+        bounded queue (2 pages per worker), so pages arrive in completion order.
+        errors (list) collects requests that failed; non-empty after the stream
+        ends = some comments were not fetched, the watermark must not move.
+        """
+        info("🚀 Starting Facebook comment stream...")
+        posts = [post for post in self.fetch_latest_posts(limit, expand_comments=expand_comments, since=since)
+                 if post.get("id")]
+        if not posts:
+            error("❌ No posts fetched from Facebook")
+            return
+
+        workers = min(max(int(concurrency or 1), 1), len(posts))
+        if workers == 1:
+            for post in posts:
+                header = self._post_header(post)
+                for page in self._iter_post_comment_pages(post, expand_comments, since, errors):
+                    yield header, page
+            return
+
+        info(f"⚡ Streaming comments for {len(posts)} posts with {workers} workers")
+        pages = queue.Queue(maxsize=workers * 2)
+        stop = threading.Event()
+        done = object()
+
+        def put(entry):
+            # gives up once the consumer has stopped, so workers never block forever
+            while not stop.is_set():
+                try:
+                    pages.put(entry, timeout=0.5)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def produce(post):
+            try:
+                if stop.is_set():
+                    return
+                header = self._post_header(post)
+                for page in self._iter_post_comment_pages(post, expand_comments, since, errors):
+                    if not put((header, page)):
+                        return
+            except Exception as e:
+                # the executor would swallow it silently
+                error(f"❌ Error streaming comments of post {post.get('id')}: {e}")
+                self._record_fetch_error(errors, f"comments of post {post.get('id')}")
+            finally:
+                put(done)
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for post in posts:
+                executor.submit(produce, post)
+            remaining = len(posts)
+            try:
+                while remaining:
+                    entry = pages.get()
+                    if entry is done:
+                        remaining -= 1
+                        continue
+                    yield entry
+            finally:
+                stop.set()
+
 
 # singleton
 facebook_api = FacebookAPI()
 
-def fetch_facebook_data(limit=3):
-    return facebook_api.fetch_facebook_data(limit)
+def fetch_facebook_data(limit=3, concurrency=FB_FETCH_CONCURRENCY, expand_comments=FB_EXPAND_COMMENTS, since=None):
+    return facebook_api.fetch_facebook_data(limit, concurrency=concurrency, expand_comments=expand_comments, since=since)
+
+def iter_facebook_comments(limit=3, concurrency=FB_FETCH_CONCURRENCY, expand_comments=FB_EXPAND_COMMENTS, since=None,
+                           errors=None):
+    return facebook_api.iter_facebook_comments(limit, concurrency=concurrency, expand_comments=expand_comments,
+                                               since=since, errors=errors)
@@ -1,33 +1,219 @@
-import requests
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime
-from utils.logger import info, error
-from config.settings import GOOGLE_API_KEY, GOOGLE_PLACE_ID, GOOGLE_BASE_URL
+from utils.logger import debug, info, error
+from utils.metrics import timer, incr
+from utils.landing import land
+from utils.http_client import get_client
+from config.settings import (
+    GOOGLE_API_KEY,
+    GOOGLE_PLACE_ID,
+    GOOGLE_BASE_URL,
+    TRANSLATION_CACHE_PATH,
+    TRANSLATION_CACHE_SIZE,
+    TRANSLATION_CACHE_TTL_DAYS,
+)
+
+# ---------------------------------------------------------------------
+# TRANSLATION CACHE
+# ---------------------------------------------------------------------
+class TranslationCache:
+    """
+    Cache hasil translate, key = sha256 dari teks asli.
+    Value = (bahasa terdeteksi, teks hasil translate).
+    Lapisan 1: LRU in-memory. Lapisan 2: SQLite lokal (persist antar run).
+    Entry lebih tua dari ttl dianggap tidak ada dan dibersihkan saat open.
+    """
+    def __init__(self, path=TRANSLATION_CACHE_PATH, max_size=TRANSLATION_CACHE_SIZE,
+                 ttl_days=TRANSLATION_CACHE_TTL_DAYS):
+        self.max_size = max(int(max_size), 1)
+        self.ttl = ttl_days * 86400
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            try:
+                folder = os.path.dirname(path)
+                if folder:
+                    os.makedirs(folder, exist_ok=True)
+                self._db = sqlite3.connect(path, check_same_thread=False)
+                self._db.execute("""
+                    CREATE TABLE IF NOT EXISTS translations (
+                        key TEXT PRIMARY KEY,
+                        source_lang TEXT,
+                        translated TEXT,
+                        created_at REAL
+                    )
+                """)
+                self._db.execute("DELETE FROM translations WHERE created_at < ?", (time.time() - self.ttl,))
+                self._db.commit()
+            except sqlite3.Error as e:
+                error(f"[Translate Cache] SQLite disabled: {e}")
+                self._db = None
+
+    @staticmethod
+    def make_key(text):
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def _remember(self, key, value):
+        # dipanggil dengan lock dipegang
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_size:
+            self._memory.popitem(last=False)
+
+    def get(self, text):
+        key = self.make_key(text)
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry and now - entry[2] <= self.ttl:
+                self._memory.move_to_end(key)
+                return entry[0], entry[1]
+
+            if self._db is None:
+                return None
+            row = self._db.execute(
+                "SELECT source_lang, translated, created_at FROM translations WHERE key = ?", (key,)
+            ).fetchone()
+            if not row or now - row[2] > self.ttl:
+                return None
+            self._remember(key, row)
+            return row[0], row[1]
+
+    def set(self, text, source_lang, translated):
+        key = self.make_key(text)
+        entry = (source_lang, translated, time.time())
+        with self._lock:
+            self._remember(key, entry)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO translations (key, source_lang, translated, created_at) VALUES (?, ?, ?, ?)",
+                    (key, *entry),
+                )
+                self._db.commit()
+
+
+translation_cache = TranslationCache()
+
+_translator = None
+_translator_lock = threading.Lock()
+
+def get_translator():
+    """
+    Satu googletrans.Translator per proses (lazy).
+    """
+    global _translator
+    with _translator_lock:
+        if _translator is None:
+            from googletrans import Translator
+            _translator = Translator()
+        return _translator
+
+
+# ---------------------------------------------------------------------
+# LOCAL LANGUAGE DETECTION
+# ---------------------------------------------------------------------
+# Kata fungsi yang sangat umum; cukup untuk membedakan review Indonesia
+# dari bahasa lain tanpa panggilan network. Hanya kata Indonesia asli:
+# kata serapan / Inggris (hotel, oke, recommended) ada di review bahasa apa
+# saja, jadi tidak dimasukkan ke list mana pun.
+ID_STOPWORDS = frozenset("""
+    yang dan di ke dari ini itu dengan untuk tidak tak ga gak nggak enggak juga sangat sekali
+    ada akan sudah udah belum bisa saya aku kami kita mereka dia nya karena tapi tetapi atau
+    pada dalam lagi saja aja banget sih dong kok deh lah pun kalau kalo jadi masih hanya cuma
+    buat sama agak lebih kurang semua bagus enak nyaman ramah bersih murah mahal kamar
+    pelayanan makanan tempat mantap terima kasih lumayan cukup
+""".split())
+
+EN_STOPWORDS = frozenset("""
+    the and is are was were to of in on for with this that it not very but or be have has
+    had we i you they he she my our your their at from as an a so too really good great
+    nice room staff food place stay would will there here
+""".split())
+
+WORD_RE = re.compile(r"[a-z]+")
+
+def detect_indonesian_locally(text, min_words=3):
+    """
+    Deteksi bahasa offline berbasis stopword.
+    Return True jika yakin Indonesia, None jika ragu (serahkan ke remote).
+    """
+    if not text:
+        return None
+    # huruf non-latin (CJK, Arab, Cyrillic, dst.) -> pasti bukan Indonesia
+    letters = [ch for ch in text if ch.isalpha()]
+    if not letters or sum(1 for ch in letters if ch.isascii()) / len(letters) < 0.9:
+        return None
+
+    words = WORD_RE.findall(text.lower())
+    if len(words) < min_words:
+        return None
+
+    id_hits = sum(1 for w in words if w in ID_STOPWORDS)
+    en_hits = sum(1 for w in words if w in EN_STOPWORDS)
+    if id_hits >= 2 and id_hits >= 3 * en_hits and id_hits / len(words) >= 0.2:
+        return True
+    return None
+
 
 # ---------------------------------------------------------------------
 # TRANSLATION
 # ---------------------------------------------------------------------
-def translate_to_indonesia(text):
+def translate_with_source(text, allow_remote=True):
     """
-    Auto-translate review ke Bahasa Indonesia jika bukan bahasa Indonesia.
-    Digunakan googletrans, tapi aman fallback jika error.
+    Sama dengan translate_to_indonesia, tapi juga mengembalikan dari mana
+    hasilnya: "local" (deteksi offline), "cache", "remote", "offline" atau "error".
+    allow_remote=False (reprocess): cache miss dikembalikan apa adanya, tanpa network.
     """
+    if detect_indonesian_locally(text):
+        return text, "local"
+
+    cached = translation_cache.get(text)
+    if cached:
+        return cached[1], "cache"
+
+    if not allow_remote:
+        return text, "offline"
+
     try:
-        from googletrans import Translator
-        translator = Translator()
+        translator = get_translator()
 
-        detection = translator.detect(text)
+        with timer("translation", channel="google"):
+            detection = translator.detect(text)
+            incr("translation_requests", channel="google")
         source_lang = detection.lang
 
         if source_lang != "id":
-            translated = translator.translate(text, src=source_lang, dest="id")
-            info(f"🌐 Auto-translate: {source_lang} → id")
-            return translated.text
+            with timer("translation", channel="google"):
+                translated = translator.translate(text, src=source_lang, dest="id")
+                incr("translation_requests", channel="google")
+            debug("🌐 Auto-translate: %s → id", source_lang)
+            translation_cache.set(text, source_lang, translated.text)
+            return translated.text, "remote"
 
-        return text
+        translation_cache.set(text, source_lang, text)
+        return text, "remote"
 
     except Exception as e:
         error(f"[Translate Error] {e}")
-        return text  # fallback: return original
+        return text, "error"  # fallback: return original
+
+
+def translate_to_indonesia(text):
+    """
+    Auto-translate review ke Bahasa Indonesia jika bukan bahasa Indonesia.
+    Digunakan googletrans, tapi aman fallback jika error.
+    Teks yang jelas Indonesia (deteksi lokal) tidak dikirim ke network.
+    Hasil (bahasa + terjemahan) disimpan di translation_cache, jadi teks yang
+    sama tidak perlu ke network lagi di run berikutnya.
+    """
+    return translate_with_source(text)[0]
 
 
 # ---------------------------------------------------------------------
@@ -47,12 +233,15 @@ def fetch_google_reviews():
 
     info("📡 Fetching data from Google Places API...")
     try:
-        response = requests.get(GOOGLE_BASE_URL, params=params, timeout=15)
-        data = response.json()
+        with timer("http_fetch", channel="google"):
+            response = get_client("google").get(GOOGLE_BASE_URL, params=params)
+            data = response.json()
     except Exception as e:
         error(f"❌ Request Failed: {e}")
         return None, []
 
+    land("google", "place_details", data, place_id=GOOGLE_PLACE_ID)
+
     if data.get("status") != "OK":
         error(f"❌ Google API Error: {data}")
         return None, []
@@ -60,6 +249,7 @@ def fetch_google_reviews():
     place = data.get("result", {})
     reviews = place.get("reviews", [])
 
+    incr("items_fetched", len(reviews), channel="google")
     info(f"✅ Successfully fetched {len(reviews)} reviews")
     return place, reviews
 
@@ -67,32 +257,54 @@ def fetch_google_reviews():
 # ---------------------------------------------------------------------
 # PROCESS REVIEWS
 # ---------------------------------------------------------------------
-def process_google_reviews(reviews_data):
+def generate_external_id(author_url, timestamp, prefix="gmaps"):
+    """
+    External ID deterministik untuk review Google: author_url + time (epoch).
+    Google tidak memberi review id, tapi pasangan ini unik per review.
+    """
+    raw = f"{prefix}|{author_url}|{int(timestamp)}"
+    return hashlib.md5(raw.encode("utf-8")).hexdigest()
+
+
+def process_google_reviews(reviews_data, allow_remote=True):
     """
     Memproses review + auto-translate ke bahasa Indonesia.
+    allow_remote=False: hanya deteksi lokal + cache (dipakai reprocess, tanpa network).
+    Review yang tidak bisa diterjemahkan offline di-skip, supaya replay tidak
+    menimpa terjemahan yang sudah tersimpan dengan teks aslinya.
     Return: processed_reviews (list)
     """
     processed = []
+    sources = {"local": 0, "cache": 0, "remote": 0, "offline": 0, "error": 0}
 
     for idx, review in enumerate(reviews_data):
         content = review.get("text") or ""
         if not content.strip():
-            info(f"⚠ Skip review {idx}: empty content")
+            debug("⚠ Skip review %d: empty content", idx)
             continue
 
         author = review.get("author_name") or ""
         timestamp = review.get("time") or datetime.now().timestamp()
         review_time = datetime.fromtimestamp(timestamp)
+        # tanpa time asli tidak ada ID stabil -> biarkan lewat jalur legacy
+        external_id = None
+        if review.get("time"):
+            external_id = generate_external_id(review.get("author_url") or author, review["time"])
 
         # ---- TRANSLATE ------------------------------------------------
-        translated = translate_to_indonesia(content)
+        translated, source = translate_with_source(content, allow_remote=allow_remote)
+        sources[source] += 1
+        if source == "offline":
+            debug("⏭ Skip review %d: not in translation cache (offline)", idx + 1)
+            continue
 
         if translated != content:
-            info(f"🔄 Review {idx+1} auto-translated")
-            info(f"   Before: {content[:60]}...")
-            info(f"   After:  {translated[:60]}...")
+            debug("🔄 Review %d auto-translated", idx + 1)
+            debug("   Before: %s...", content[:60])
+            debug("   After:  %s...", translated[:60])
 
         processed.append({
+            "external_id": external_id,
             "author_name": author,
             "rating": review.get("rating"),
             "content": translated,
@@ -109,5 +321,14 @@ def process_google_reviews(reviews_data):
             }
         })
 
+    for source, count in sources.items():
+        incr(f"translation_{source}", count, channel="google")
+    avoided = sources["local"] + sources["cache"]
+    info(
+        f"🌐 Translation: remote calls {sources['remote'] + sources['error']}, "
+        f"avoided {avoided} (local {sources['local']}, cache {sources['cache']})"
+    )
+    if sources["offline"]:
+        info(f"⏭ Skipped {sources['offline']} reviews not in translation cache (offline, use --translate)")
     info(f"🔍 Processed {len(processed)} reviews")
     return processed
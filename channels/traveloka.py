@@ -3,15 +3,93 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, StaleElementReferenceException
-import time
-import re
-from datetime import datetime, timedelta
+from selenium.common.exceptions import TimeoutException
+import base64
+import json
+import queue
+import threading
+from channels.traveloka_payload import (
+    find_review_records,
+    get_review_data,
+    parse_review_record,
+    review_key,
+)
+from utils.metrics import timer, incr
+from utils.logger import debug, info, warn, error
+from utils.landing import land
+from config.settings import (
+    TRAVELOKA_CAPTURE_MODE,
+    TRAVELOKA_REVIEW_API_PATTERN,
+    TRAVELOKA_BROWSER_WORKERS,
+    TRAVELOKA_KNOWN_STOP_RATIO,
+    TRAVELOKA_LEAN_PROFILE,
+    TRAVELOKA_PAGE_LOAD_TIMEOUT,
+    TRAVELOKA_REVIEW_WAIT_TIMEOUT,
+    TRAVELOKA_SCROLL_WAIT_TIMEOUT,
+    TRAVELOKA_REVIEW_TAB_TIMEOUT,
+    TRAVELOKA_NEXT_BUTTON_TIMEOUT,
+    TRAVELOKA_NETWORK_IDLE_MS,
+)
 
 
-def crawl_traveloka_reviews(hotel_url, max_pages=5):
+REVIEW_CARD_SELECTOR = 'div.css-1dbjc4n.r-14lw9ot.r-h1746q.r-kdyh1x.r-d045u9.r-1udh08x.r-d23pfw'
+REVIEW_AUTHOR_SELECTOR = 'div.css-901oao.r-uh8wd5.r-b88u0q.r-fdjqy7'
+REVIEW_CONTENT_SELECTOR = 'div.css-1dbjc4n.r-1udh08x > div.css-1dbjc4n > div.css-901oao.css-cens5h.r-uh8wd5.r-1b43r93.r-majxgm.r-rjixqe.r-fdjqy7'
+REVIEW_RATING_SELECTOR = 'div[data-testid="tvat-ratingScore"]'
+REVIEW_DATE_SELECTOR = 'div.css-901oao.r-1ud240a.r-uh8wd5.r-1b43r93.r-b88u0q.r-1cwl3u0.r-fdjqy7'
+
+# One round trip per page: read every review card in the browser and
+# return plain values, so no WebElement can go stale afterwards.
+EXTRACT_REVIEWS_SCRIPT = """
+const [cardSel, authorSel, contentSel, ratingSel, dateSel] = arguments;
+const text = (root, sel) => {
+    const el = root.querySelector(sel);
+    return el ? el.innerText.trim() : null;
+};
+return Array.from(document.querySelectorAll(cardSel)).map(card => ({
+    author_name: text(card, authorSel),
+    content: text(card, contentSel),
+    rating_text: text(card, ratingSel),
+    date_text: text(card, dateSel),
+}));
+"""
+
+
+# Dropped by the lean profile: images, fonts, media and third-party analytics.
+BLOCKED_URL_PATTERNS = [
+    "*.jpg", "*.jpeg", "*.png", "*.gif", "*.webp", "*.avif", "*.ico", "*.svg",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.mp4", "*.webm", "*.m3u8", "*.mp3",
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*connect.facebook.net*", "*hotjar.com*", "*branch.io*", "*criteo*",
+    "*tiktok.com*", "*clarity.ms*", "*newrelic*", "*nr-data.net*", "*sentry*",
+]
+
+
+def build_chrome_options(lean=TRAVELOKA_LEAN_PROFILE, capture_network=False):
     options = Options()
-    options.add_argument("--start-maximized")
+    if capture_network:
+        # exposes Network.* events through driver.get_log("performance")
+        options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    if lean:
+        options.add_argument("--headless=new")
+        options.page_load_strategy = "eager"
+        options.add_argument("--window-size=1366,2000")
+        # skip background/warm-up work a one-off crawl never benefits from
+        options.add_argument("--disable-background-networking")
+        options.add_argument("--disable-component-update")
+        options.add_argument("--disable-default-apps")
+        options.add_argument("--disable-sync")
+        options.add_argument("--no-first-run")
+        options.add_argument("--no-default-browser-check")
+        options.add_argument("--mute-audio")
+        options.add_argument("--blink-settings=imagesEnabled=false")
+        options.add_experimental_option("prefs", {
+            "profile.managed_default_content_settings.images": 2,
+            "profile.default_content_setting_values.notifications": 2,
+        })
+    else:
+        options.add_argument("--start-maximized")
     options.add_argument("--no-sandbox")
     options.add_argument("--disable-dev-shm-usage")
     options.add_argument("--disable-blink-features=AutomationControlled")
@@ -24,89 +102,297 @@ def crawl_traveloka_reviews(hotel_url, max_pages=5):
     options.add_argument("--disable-webgl")
     options.add_argument("--disable-extensions")
     options.add_argument("--disable-features=VizDisplayCompositor")
+    return options
+
+
+def apply_resource_blocking(driver):
+    """Block heavy/third-party requests through CDP (Chrome only)"""
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+        info("Blocking %d resource patterns", len(BLOCKED_URL_PATTERNS))
+    except Exception as e:
+        warn("Could not enable resource blocking: %s", e)
+
+
+def collect_network_reviews(driver, url_pattern=TRAVELOKA_REVIEW_API_PATTERN):
+    """
+    Read review JSON from XHR responses seen since the last call
+    (driver.get_log drains the performance log) and return raw review records.
+    """
+    records = []
+    for entry in driver.get_log("performance"):
+        try:
+            message = json.loads(entry["message"])["message"]
+        except (KeyError, ValueError):
+            continue
+        if message.get("method") != "Network.responseReceived":
+            continue
+
+        params = message.get("params", {})
+        response = params.get("response", {})
+        if url_pattern not in response.get("url", "") or "json" not in response.get("mimeType", ""):
+            continue
+
+        try:
+            body = driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": params["requestId"]})
+            text = body.get("body", "")
+            if body.get("base64Encoded"):
+                text = base64.b64decode(text).decode("utf-8")
+            records.extend(find_review_records(json.loads(text)))
+        except Exception as e:
+            debug("Could not read review payload %s: %s", response.get("url"), e)
+
+    return records
+
+
+def create_driver(lean=TRAVELOKA_LEAN_PROFILE, capture_network=False):
+    driver = webdriver.Chrome(options=build_chrome_options(lean, capture_network=capture_network))
+    if lean:
+        apply_resource_blocking(driver)
+    elif capture_network:
+        driver.execute_cdp_cmd("Network.enable", {})
+    return driver
+
+
+def reset_driver(driver, capture_network=False):
+    """Clear per-hotel state so a long-lived driver can crawl the next target"""
+    try:
+        driver.delete_all_cookies()
+        driver.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+    except Exception as e:
+        warn("Could not clear browser storage: %s", e)
+    driver.get("about:blank")
+    if capture_network:
+        driver.get_log("performance")  # drain leftovers from the previous hotel
+
+
+def discard_driver(driver):
+    """Quit a driver that may already be dead; always returns None"""
+    if driver is not None:
+        try:
+            driver.quit()
+        except Exception:
+            pass
+    return None
 
-    driver = webdriver.Chrome(options=options)
-    wait = WebDriverWait(driver, 15)
+
+def crawl_traveloka_reviews(hotel_url, max_pages=5, lean=TRAVELOKA_LEAN_PROFILE, capture=TRAVELOKA_CAPTURE_MODE,
+                            known_keys=None, checkpoint=None, on_page=None):
+    capture_network = capture == "network"
+    driver = create_driver(lean, capture_network=capture_network)
+    try:
+        return crawl_with_driver(
+            driver, hotel_url, max_pages, capture_network=capture_network, known_keys=known_keys,
+            checkpoint=checkpoint, on_page=on_page,
+        )
+    finally:
+        driver.quit()
+        info("Browser closed")
+
+
+def crawl_with_driver(driver, hotel_url, max_pages=5, capture_network=False, known_keys=None,
+                      checkpoint=None, on_page=None):
+    """
+    known_keys: review_key() values already stored in raw_feedback. Known
+    reviews are not collected again, and pagination stops once a page is
+    mostly (TRAVELOKA_KNOWN_STOP_RATIO) known.
+    checkpoint: CrawlCheckpoint; progress is saved after every completed page
+    and a later run resumes from the page after the last completed one.
+    on_page(hotel_url, hotel_name, page_reviews): called with each page's new
+    reviews before the page is checkpointed (used to flush to the database).
+    """
     
     reviews_data = []
     collected_reviews = set()
+    hotel_name = "Unknown"
+    resume_from = 0
+    
+    saved = checkpoint.load(hotel_url) if checkpoint else None
+    if saved:
+        reviews_data.extend(saved["reviews"])
+        collected_reviews.update(review_key(r) for r in saved["reviews"])
+        resume_from = saved["last_page"] + 1
+        info("Resuming from page %d (%d reviews in checkpoint)", resume_from + 1, len(reviews_data))
 
     try:
-        print(f"Navigating to: {hotel_url}")
-        driver.get(hotel_url)
-        time.sleep(8)
-        
-        wait.until(lambda driver: driver.execute_script("return document.readyState") == "complete")
+        info("Navigating to: %s", hotel_url)
+        with timer("page_load", channel="traveloka"):
+            driver.get(hotel_url)
+            wait_until(driver, lambda d: d.execute_script("return document.readyState") == "complete",
+                       TRAVELOKA_PAGE_LOAD_TIMEOUT, "page load")
+            wait_for_network_idle(driver)
         
-        hotel_name = "Unknown"
         try:
             name_tag = driver.find_element(By.CSS_SELECTOR, 'h1')
             if name_tag:
                 hotel_name = name_tag.text.strip()
-                print(f"Hotel: {hotel_name}")
+                info("Hotel: %s", hotel_name)
         except Exception as e:
-            print(f"Could not find hotel name: {e}")
+            warn("Could not find hotel name: %s", e)
 
-        review_tab = find_review_tab(driver, wait)
+        review_tab = find_review_tab(driver)
         if not review_tab:
-            print("Failed to find review tab, returning empty data")
+            error("Failed to find review tab, returning empty data")
             return hotel_name, []
         
         driver.execute_script("arguments[0].click();", review_tab)
-        print("Clicked on reviews tab")
-        time.sleep(5)
+        debug("Clicked on reviews tab")
         
-        try:
-            wait.until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, 'div.css-1dbjc4n.r-14lw9ot.r-h1746q.r-kdyh1x.r-d045u9.r-1udh08x.r-d23pfw'))
-            )
-            print("Review container loaded successfully")
-        except TimeoutException:
-            print("Review container not found, attempting to continue")
+        if wait_until(driver, lambda d: count_reviews(d) > 0, TRAVELOKA_REVIEW_WAIT_TIMEOUT, "review container"):
+            debug("Review container loaded successfully")
+        else:
+            warn("Review container not found, attempting to continue")
 
         current_page = 0
+        while current_page < min(resume_from, max_pages):
+            if not paginate(driver):
+                warn("Could not skip to checkpoint page %d", resume_from + 1)
+                break
+            current_page += 1
+        if current_page and capture_network:
+            driver.get_log("performance")  # drop payloads of the skipped pages
+
         while current_page < max_pages:
-            print(f"Processing Page {current_page + 1}")
+            info("Processing Page %d", current_page + 1)
             
-            scroll_and_load_reviews(driver, wait)
-            time.sleep(2)
-            
-            review_tags = driver.find_elements(By.CSS_SELECTOR, 'div.css-1dbjc4n.r-14lw9ot.r-h1746q.r-kdyh1x.r-d045u9.r-1udh08x.r-d23pfw')
+            with timer("page_extract", channel="traveloka"):
+                review_items, parser = [], get_review_data
+                if capture_network:
+                    wait_for_network_idle(driver, timeout=TRAVELOKA_REVIEW_WAIT_TIMEOUT)
+                    review_items, parser = collect_network_reviews(driver), parse_review_record
+                    if not review_items:
+                        warn("No review payload captured, falling back to DOM extraction")
+
+                if not review_items:
+                    scroll_and_load_reviews(driver)
+                    review_items, parser = extract_page_reviews(driver), get_review_data
+            incr("pages", channel="traveloka")
+            incr("items_fetched", len(review_items), channel="traveloka")
+            if review_items:
+                land("traveloka", "review_items", review_items, hotel_url=hotel_url, hotel_name=hotel_name,
+                     capture="network" if parser is parse_review_record else "dom")
             
-            if not review_tags:
-                print("No reviews found on this page")
+            if not review_items:
+                info("No reviews found on this page")
                 break
                 
-            print(f"Found {len(review_tags)} reviews to process")
+            debug("Found %d reviews to process", len(review_items))
             
-            page_reviews_count = process_reviews(review_tags, collected_reviews, reviews_data, driver)
+            page_start = len(reviews_data)
+            page_reviews_count, known_hits = process_reviews(
+                review_items, collected_reviews, reviews_data, parser, known_keys=known_keys
+            )
+            if on_page and page_reviews_count:
+                on_page(hotel_url, hotel_name, reviews_data[page_start:])
+            if checkpoint:
+                checkpoint.save(hotel_url, current_page, hotel_name, reviews_data)
             
-            print(f"Added {page_reviews_count} new reviews from page {current_page + 1}")
-            print(f"Total unique reviews collected: {len(reviews_data)}")
+            info("Added %d new reviews from page %d", page_reviews_count, current_page + 1)
+            info("Total unique reviews collected: %d", len(reviews_data))
             
-            if not click_next_page(driver, wait):
-                print("No more pages available")
+            if known_keys and known_hits >= TRAVELOKA_KNOWN_STOP_RATIO * len(review_items):
+                info("Page %d is mostly known (%d/%d), stopping", current_page + 1, known_hits, len(review_items))
+                break
+            
+            if not paginate(driver):
+                info("No more pages available")
                 break
             
             current_page += 1
             
             if len(reviews_data) >= 100:
-                print("Reached target of 100 reviews")
+                info("Reached target of 100 reviews")
                 break
 
-        print(f"Scraping completed. Total reviews collected: {len(reviews_data)}")
+        info("Scraping completed. Total reviews collected: %d", len(reviews_data))
+        if checkpoint:
+            checkpoint.clear(hotel_url)
         return hotel_name, reviews_data
 
     except Exception as e:
-        print(f"Error during crawling: {str(e)}")
+        # checkpoint is kept so the next run resumes after the last completed page
+        error("Error during crawling: %s", e)
         return hotel_name, reviews_data
 
-    finally:
-        driver.quit()
-        print("Browser closed")
 
+def iter_crawl_traveloka(hotel_urls, max_pages=5, workers=TRAVELOKA_BROWSER_WORKERS,
+                         lean=TRAVELOKA_LEAN_PROFILE, capture=TRAVELOKA_CAPTURE_MODE, known_keys=None,
+                         checkpoint=None, on_page=None):
+    """
+    Crawl many hotels over a bounded pool of long-lived browsers (one thread per driver).
+    Yields (hotel_url, hotel_name, reviews_data) as soon as each hotel finishes.
+    """
+    capture_network = capture == "network"
+    targets = queue.Queue()
+    for url in hotel_urls:
+        targets.put(url)
+    results = queue.Queue()
+    workers = max(1, min(int(workers), len(hotel_urls)))
+
+    def worker():
+        driver = None
+        try:
+            while True:
+                try:
+                    url = targets.get_nowait()
+                except queue.Empty:
+                    return
+                try:
+                    if driver is None:
+                        driver = create_driver(lean, capture_network=capture_network)
+                    hotel_name, reviews_data = crawl_with_driver(
+                        driver, url, max_pages, capture_network=capture_network, known_keys=known_keys,
+                        checkpoint=checkpoint, on_page=on_page,
+                    )
+                except Exception as e:
+                    error("Browser worker failed on %s: %s", url, e)
+                    hotel_name, reviews_data = "Unknown", []
+                    # driver state is unknown after a failure, start fresh for the next target
+                    driver = discard_driver(driver)
+                # hand the result over before touching the browser again: a failed
+                # reset must not throw away reviews that were already crawled
+                results.put((url, hotel_name, reviews_data))
+                if driver is not None:
+                    try:
+                        reset_driver(driver, capture_network=capture_network)
+                    except Exception as e:
+                        warn("Browser reset failed after %s, starting a new one: %s", url, e)
+                        driver = discard_driver(driver)
+        finally:
+            try:
+                if driver is not None:
+                    discard_driver(driver)
+                    info("Browser closed")
+            finally:
+                # always signal completion, or the consumer below waits forever
+                results.put(None)
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+
+    finished = 0
+    while finished < workers:
+        result = results.get()
+        if result is None:
+            finished += 1
+            continue
+        yield result
+
+    for thread in threads:
+        thread.join()
+
+
+def clickable_any(selectors):
+    """One wait condition for several selectors (// = XPath, otherwise CSS); returns the first match"""
+    return EC.any_of(*(
+        EC.element_to_be_clickable((By.XPATH if selector.startswith('//') else By.CSS_SELECTOR, selector))
+        for selector in selectors
+    ))
 
-def find_review_tab(driver, wait):
+
+def find_review_tab(driver, timeout=TRAVELOKA_REVIEW_TAB_TIMEOUT):
     tab_selectors = [
         'div[data-testid="tabItem-reviews"]',
         'div[data-testid*="review"]',
@@ -115,169 +401,137 @@ def find_review_tab(driver, wait):
         '//div[@role="tab" and contains(text(), "Review")]'
     ]
     
-    for selector in tab_selectors:
-        try:
-            if selector.startswith('//'):
-                review_tab = wait.until(EC.element_to_be_clickable((By.XPATH, selector)))
-            else:
-                review_tab = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, selector)))
-            print(f"Found review tab: {selector}")
-            return review_tab
-        except:
-            continue
+    # all selectors share one timeout, so a missing tab costs timeout, not timeout per selector
+    try:
+        review_tab = WebDriverWait(driver, timeout, poll_frequency=0.2).until(clickable_any(tab_selectors))
+        debug("Found review tab")
+        return review_tab
+    except TimeoutException:
+        warn("Review tab not clickable after %ss, trying text search", timeout)
     
     try:
         review_tab = driver.find_element(By.XPATH, '//div[contains(text(), "Review")]')
-        print("Found review tab using text search")
+        debug("Found review tab using text search")
         return review_tab
     except:
-        print("Review tab not found with any selector")
+        warn("Review tab not found with any selector")
         return None
 
 
-def process_reviews(review_tags, collected_reviews, reviews_data, driver):
+def extract_page_reviews(driver):
+    """Read all review cards on the current page with a single execute_script call"""
+    return driver.execute_script(
+        EXTRACT_REVIEWS_SCRIPT,
+        REVIEW_CARD_SELECTOR,
+        REVIEW_AUTHOR_SELECTOR,
+        REVIEW_CONTENT_SELECTOR,
+        REVIEW_RATING_SELECTOR,
+        REVIEW_DATE_SELECTOR,
+    ) or []
+
+
+def process_reviews(review_items, collected_reviews, reviews_data, parser=None, known_keys=None):
+    """
+    Parse page items and collect new reviews.
+    Returns (added, known_hits); known_hits counts reviews already in known_keys.
+    """
+    parser = parser or get_review_data
     page_reviews_count = 0
+    known_hits = 0
     
-    for i, review in enumerate(review_tags):
+    for i, item in enumerate(review_items):
         try:
-            review_data = get_review_data(review)
+            review_data = parser(item)
             if review_data:
-                review_key = f"{review_data['author_name']}_{review_data['content'][:100]}"
+                key = review_key(review_data)
                 
-                if review_key not in collected_reviews:
-                    collected_reviews.add(review_key)
+                if known_keys and key in known_keys:
+                    known_hits += 1
+                elif key not in collected_reviews:
+                    collected_reviews.add(key)
                     reviews_data.append(review_data)
                     page_reviews_count += 1
-        except StaleElementReferenceException:
-            review_tags = refresh_review_elements(driver)
-            if i < len(review_tags):
-                try:
-                    review_data = get_review_data(review_tags[i])
-                    if review_data:
-                        review_key = f"{review_data['author_name']}_{review_data['content'][:100]}"
-                        if review_key not in collected_reviews:
-                            collected_reviews.add(review_key)
-                            reviews_data.append(review_data)
-                            page_reviews_count += 1
-                except:
-                    continue
         except Exception as e:
-            print(f"Error processing review {i}: {str(e)}")
+            debug("Error processing review %d: %s", i, e)
     
-    return page_reviews_count
+    return page_reviews_count, known_hits
 
 
-def refresh_review_elements(driver):
-    return driver.find_elements(By.CSS_SELECTOR, 'div.css-1dbjc4n.r-14lw9ot.r-h1746q.r-kdyh1x.r-d045u9.r-1udh08x.r-d23pfw')
+def wait_until(driver, condition, timeout, label):
+    """Poll condition until true or timeout (upper bound); return whether it was met"""
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=0.2).until(condition)
+        return True
+    except TimeoutException:
+        warn("Wait for %s timed out after %ss", label, timeout)
+        return False
 
 
-def get_review_data(review_element):
-    try:
-        review_name_tag = review_element.find_element(By.CSS_SELECTOR, 'div.css-901oao.r-uh8wd5.r-b88u0q.r-fdjqy7')
-        review_content_tag = review_element.find_element(By.CSS_SELECTOR, 'div.css-1dbjc4n.r-1udh08x > div.css-1dbjc4n > div.css-901oao.css-cens5h.r-uh8wd5.r-1b43r93.r-majxgm.r-rjixqe.r-fdjqy7')
-        rating_title_tag = review_element.find_element(By.CSS_SELECTOR, 'div[data-testid="tvat-ratingScore"]')
-        review_date_tag = review_element.find_element(By.CSS_SELECTOR, 'div.css-901oao.r-1ud240a.r-uh8wd5.r-1b43r93.r-b88u0q.r-1cwl3u0.r-fdjqy7')
-        
-        author_name = review_name_tag.text.strip()
-        content = review_content_tag.text.strip()
-        rating_text = rating_title_tag.text.strip()
-        review_date_text = review_date_tag.text.strip()
-        
-        # Extract numeric rating only
-        rating = extract_numeric_rating(rating_text)
-        review_date = parse_review_date(review_date_text)
-        
-        return {
-            "author_name": author_name,
-            "content": content,
-            "rating": rating,
-            "review_created_at": review_date,
-            "metadata": {
-                "source": "traveloka",
-                "raw_date_text": review_date_text,
-                "original_rating": rating_text
-            }
-        }
-    except Exception as e:
-        print(f"Error extracting review data: {str(e)}")
-        return None
+def count_reviews(driver):
+    return driver.execute_script("return document.querySelectorAll(arguments[0]).length", REVIEW_CARD_SELECTOR)
 
 
-def extract_numeric_rating(rating_text):
-    """Extract numeric rating from various formats"""
-    try:
-        # Remove non-numeric characters except comma and dot
-        cleaned = re.sub(r'[^\d,.]', '', rating_text)
-        
-        # Replace comma with dot for decimal numbers
-        cleaned = cleaned.replace(',', '.')
-        
-        # Convert to float
-        rating = float(cleaned)
-        
-        # If rating is more than 10, divide by 10 (e.g., 97 -> 9.7)
-        if rating > 10:
-            rating = rating / 10
-        
-        return rating
-    except:
-        return None
+def first_review_text(driver):
+    return driver.execute_script(
+        "const el = document.querySelector(arguments[0]); return el ? el.innerText : '';",
+        REVIEW_CARD_SELECTOR,
+    )
 
 
-def parse_review_date(date_text):
-    try:
-        parts = re.sub(r'\b(?:Reviewed|ago)\b|\(s\)', '', date_text).strip().split(' ')
-        if (len(parts) != 2) or (not parts[0].isdigit()) or (parts[1] not in ['day', 'days', 'week', 'weeks', 'month', 'months']):
-            return None
-        
-        if parts[1] in ['day', 'days']:
-            delta_args = {'days': int(parts[0])}
-        elif parts[1] in ['week', 'weeks']:
-            delta_args = {'weeks': int(parts[0])}
-        else:
-            delta_args = {'days': int(parts[0]) * 30}
-        
-        return (datetime.today() - timedelta(**delta_args)).date()
-    except:
-        return None
+NETWORK_IDLE_SCRIPT = """
+performance.setResourceTimingBufferSize(10000);
+const entries = performance.getEntriesByType('resource');
+const lastEnd = entries.reduce((max, e) => Math.max(max, e.responseEnd), 0);
+return performance.now() - lastEnd;
+"""
+
+
+def wait_for_network_idle(driver, idle_ms=TRAVELOKA_NETWORK_IDLE_MS, timeout=TRAVELOKA_PAGE_LOAD_TIMEOUT):
+    """Wait until no resource finished loading for idle_ms milliseconds"""
+    return wait_until(driver, lambda d: d.execute_script(NETWORK_IDLE_SCRIPT) >= idle_ms, timeout, "network idle")
 
 
-def scroll_and_load_reviews(driver, wait):
-    last_height = driver.execute_script("return document.body.scrollHeight")
-    reviews_count = 0
-    scroll_attempts = 0
-    max_scroll_attempts = 5
+def scroll_and_load_reviews(driver, max_scroll_attempts=5):
+    reviews_count = count_reviews(driver)
     
-    print("Scrolling to load reviews")
+    debug("Scrolling to load reviews")
     
-    while scroll_attempts < max_scroll_attempts:
+    for attempt in range(max_scroll_attempts):
+        last_height = driver.execute_script("return document.body.scrollHeight")
         driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-        time.sleep(2)
         
-        current_reviews = driver.find_elements(By.CSS_SELECTOR, 'div.css-1dbjc4n.r-14lw9ot.r-h1746q.r-kdyh1x.r-d045u9.r-1udh08x.r-d23pfw')
-        
-        if len(current_reviews) > reviews_count:
-            print(f"Loaded {len(current_reviews)} reviews")
-            reviews_count = len(current_reviews)
-            scroll_attempts = 0
-        else:
-            scroll_attempts += 1
-            print(f"No new reviews ({scroll_attempts}/{max_scroll_attempts})")
-        
-        new_height = driver.execute_script("return document.body.scrollHeight")
-        if new_height == last_height:
+        grew = wait_until(
+            driver,
+            lambda d: count_reviews(d) > reviews_count
+            or d.execute_script("return document.body.scrollHeight") > last_height,
+            TRAVELOKA_SCROLL_WAIT_TIMEOUT,
+            "more reviews",
+        )
+        if not grew:
             break
         
-        last_height = new_height
-        time.sleep(1)
+        current_count = count_reviews(driver)
+        if current_count > reviews_count:
+            debug("Loaded %d reviews", current_count)
+            reviews_count = current_count
     
-    print(f"Scrolling completed. Found {reviews_count} reviews")
+    debug("Scrolling completed. Found %d reviews", reviews_count)
+
 
+def paginate(driver):
+    """click_next_page, timed as the "pagination" stage"""
+    with timer("pagination", channel="traveloka"):
+        return click_next_page(driver)
 
-def click_next_page(driver, wait):
+
+def click_next_page(driver, timeout=TRAVELOKA_NEXT_BUTTON_TIMEOUT):
+    """
+    Click the next-page button; True only when the review list actually changed.
+    timeout bounds the button search (all selectors together); the page change
+    itself is bounded by TRAVELOKA_REVIEW_WAIT_TIMEOUT.
+    """
     try:
         driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-        time.sleep(2)
         
         next_selectors = [
             'div[data-testid="next-page-btn"]',
@@ -286,38 +540,34 @@ def click_next_page(driver, wait):
             'div[role="button"][tabindex="0"] svg[data-id="IcSystemChevronRight"]'
         ]
         
-        for selector in next_selectors:
-            try:
-                next_button = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, selector)))
-                print(f"Found next button: {selector}")
-                
-                if "disabled" in next_button.get_attribute("class") or next_button.get_attribute("aria-disabled") == "true":
-                    print("Next button is disabled")
-                    return False
-                
-                driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", next_button)
-                time.sleep(1)
-                
-                driver.execute_script("arguments[0].click();", next_button)
-                print("Clicked next page")
-                
-                time.sleep(3)
-                wait.until(lambda driver: driver.execute_script("return document.readyState") == "complete")
-                
-                wait.until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, 'div.css-1dbjc4n.r-14lw9ot.r-h1746q.r-kdyh1x.r-d045u9.r-1udh08x.r-d23pfw'))
-                )
-                
-                return True
-            except:
-                continue
+        try:
+            next_button = WebDriverWait(driver, timeout, poll_frequency=0.2).until(clickable_any(next_selectors))
+        except TimeoutException:
+            info("Next button not found")
+            return False
+        debug("Found next button")
         
-        print("Next button not found")
-        return False
-            
-    except TimeoutException:
-        print("Timeout waiting for next button")
-        return False
+        if "disabled" in (next_button.get_attribute("class") or "") or next_button.get_attribute("aria-disabled") == "true":
+            info("Next button is disabled")
+            return False
+        
+        previous_first = first_review_text(driver)
+        driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", next_button)
+        driver.execute_script("arguments[0].click();", next_button)
+        debug("Clicked next page")
+        
+        # page changed once the first review differs from the one before the click
+        changed = wait_until(
+            driver,
+            lambda d: count_reviews(d) > 0 and first_review_text(d) != previous_first,
+            TRAVELOKA_REVIEW_WAIT_TIMEOUT,
+            "next page reviews",
+        )
+        if not changed:
+            warn("Clicked next page but the reviews did not change")
+            return False
+        wait_for_network_idle(driver, timeout=TRAVELOKA_REVIEW_WAIT_TIMEOUT)
+        return True
     except Exception as e:
-        print(f"Error clicking next button: {str(e)}")
-        return False
\ No newline at end of file
+        error("Error clicking next button: %s", e)
+        return False
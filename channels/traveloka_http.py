@@ -0,0 +1,171 @@
+import html
+import json
+import re
+import requests
+from channels.traveloka_payload import extract_hotel_id, find_review_records, parse_review_record, review_key
+from utils.metrics import timer, incr
+from utils.logger import info, error
+from utils.landing import land
+from utils.http_client import get_client
+from config.settings import TRAVELOKA_REVIEW_API_URL, TRAVELOKA_HTTP_PAGE_SIZE, TRAVELOKA_KNOWN_STOP_RATIO
+
+# Browser-free Traveloka backend: fetch the hotel page and the review
+# endpoint over plain HTTP and parse the embedded JSON state. Returns the
+# same (hotel_name, reviews_data) contract as crawl_traveloka_reviews.
+
+HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+    ),
+    "Accept-Language": "id-ID,id;q=0.9,en;q=0.8",
+}
+
+NEXT_DATA_RE = re.compile(r'<script[^>]+id="__NEXT_DATA__"[^>]*>(.*?)</script>', re.S)
+INITIAL_STATE_RE = re.compile(r'window\.__(?:INITIAL_STATE|APOLLO_STATE|PRELOADED_STATE)__\s*=\s*(\{.*?\})\s*;?\s*</script>', re.S)
+H1_RE = re.compile(r'<h1[^>]*>(.*?)</h1>', re.S)
+OG_TITLE_RE = re.compile(r'<meta[^>]+property="og:title"[^>]+content="([^"]*)"')
+TAG_RE = re.compile(r'<[^>]+>')
+
+
+def extract_embedded_state(page_html):
+    """Return every JSON state blob embedded in the page (Next.js data, window.__*_STATE__)"""
+    states = []
+    for pattern in (NEXT_DATA_RE, INITIAL_STATE_RE):
+        for raw in pattern.findall(page_html):
+            try:
+                states.append(json.loads(raw))
+            except ValueError:
+                continue
+    return states
+
+
+def extract_hotel_name(page_html):
+    match = H1_RE.search(page_html) or OG_TITLE_RE.search(page_html)
+    if not match:
+        return "Unknown"
+    return html.unescape(TAG_RE.sub("", match.group(1))).strip() or "Unknown"
+
+
+def fetch_review_page(session, hotel_id, page, page_size=TRAVELOKA_HTTP_PAGE_SIZE, api_url=TRAVELOKA_REVIEW_API_URL):
+    """POST one page to the review endpoint; body mirrors what the web client sends"""
+    body = {
+        "data": {
+            "objectId": hotel_id,
+            "productType": "HOTEL",
+            "skip": page * page_size,
+            "top": page_size,
+        }
+    }
+    with timer("pagination", channel="traveloka"):
+        response = get_client("traveloka").post(api_url, json=body, session=session)
+        response.raise_for_status()
+        return response.json()
+
+
+def collect_reviews(records, collected_reviews, reviews_data, capture, known_keys=None):
+    """Returns (added, known_hits), same as traveloka.process_reviews"""
+    added = 0
+    known_hits = 0
+    for record in records:
+        review_data = parse_review_record(record, capture=capture)
+        if not review_data:
+            continue
+        key = review_key(review_data)
+        if known_keys and key in known_keys:
+            known_hits += 1
+        elif key not in collected_reviews:
+            collected_reviews.add(key)
+            reviews_data.append(review_data)
+            added += 1
+    return added, known_hits
+
+
+def crawl_traveloka_reviews_http(hotel_url, max_pages=5, session=None, api_url=TRAVELOKA_REVIEW_API_URL,
+                                 known_keys=None, checkpoint=None, on_page=None):
+    """
+    checkpoint / on_page behave as in traveloka.crawl_with_driver; resuming
+    starts the review endpoint at the page after the last completed one.
+    """
+    session = session or requests.Session()
+    session.headers.update(HEADERS)
+
+    reviews_data = []
+    collected_reviews = set()
+    hotel_name = "Unknown"
+    resume_from = 0
+
+    saved = checkpoint.load(hotel_url) if checkpoint else None
+    if saved:
+        reviews_data.extend(saved["reviews"])
+        collected_reviews.update(review_key(r) for r in saved["reviews"])
+        resume_from = saved["last_page"] + 1
+        info("Resuming from page %d (%d reviews in checkpoint)", resume_from + 1, len(reviews_data))
+
+    try:
+        info("Fetching: %s", hotel_url)
+        with timer("http_fetch", channel="traveloka"):
+            response = get_client("traveloka").get(hotel_url, session=session)
+            response.raise_for_status()
+            page_html = response.text
+
+        hotel_name = extract_hotel_name(page_html)
+        info("Hotel: %s", hotel_name)
+
+        for state in extract_embedded_state(page_html):
+            state_start = len(reviews_data)
+            state_records = list(find_review_records(state))
+            if state_records:
+                land("traveloka", "review_items", state_records,
+                     hotel_url=hotel_url, hotel_name=hotel_name, capture="http-embedded")
+            added, _ = collect_reviews(state_records, collected_reviews, reviews_data, "http-embedded", known_keys)
+            if added:
+                info("Added %d reviews from embedded page state", added)
+                if on_page:
+                    on_page(hotel_url, hotel_name, reviews_data[state_start:])
+
+        hotel_id = extract_hotel_id(hotel_url)
+        if not api_url or not hotel_id:
+            info("Review endpoint or hotel id not available, using embedded state only")
+            if checkpoint:
+                checkpoint.clear(hotel_url)
+            return hotel_name, reviews_data
+
+        for page in range(resume_from, max_pages):
+            payload = fetch_review_page(session, hotel_id, page, api_url=api_url)
+            records = list(find_review_records(payload))
+            incr("pages", channel="traveloka")
+            incr("items_fetched", len(records), channel="traveloka")
+            if records:
+                land("traveloka", "review_items", records, hotel_url=hotel_url, hotel_name=hotel_name, capture="http")
+            if not records:
+                info("No reviews returned for page %d", page + 1)
+                break
+
+            page_start = len(reviews_data)
+            added, known_hits = collect_reviews(records, collected_reviews, reviews_data, "http", known_keys)
+            if on_page and added:
+                on_page(hotel_url, hotel_name, reviews_data[page_start:])
+            if checkpoint:
+                checkpoint.save(hotel_url, page, hotel_name, reviews_data)
+            info("Added %d new reviews from page %d", added, page + 1)
+            info("Total unique reviews collected: %d", len(reviews_data))
+            if known_keys and known_hits >= TRAVELOKA_KNOWN_STOP_RATIO * len(records):
+                info("Page %d is mostly known (%d/%d), stopping", page + 1, known_hits, len(records))
+                break
+            if not added:
+                info("Page returned only known reviews, stopping")
+                break
+
+            if len(reviews_data) >= 100:
+                info("Reached target of 100 reviews")
+                break
+
+        info("HTTP crawl completed. Total reviews collected: %d", len(reviews_data))
+        if checkpoint:
+            checkpoint.clear(hotel_url)
+        return hotel_name, reviews_data
+
+    except Exception as e:
+        error("Error during HTTP crawl: %s", e)
+        return hotel_name, reviews_data
@@ -0,0 +1,217 @@
+import hashlib
+import re
+from datetime import datetime, timedelta
+from utils.logger import debug
+
+# Field names seen in Traveloka review JSON (XHR responses / embedded state).
+# The payload shape is not documented, so review objects are located by
+# their fields rather than by a fixed path.
+AUTHOR_KEYS = ("reviewerName", "reviewer_name", "authorName", "userName", "displayName")
+CONTENT_KEYS = ("reviewText", "review_text", "text", "content", "comment")
+RATING_KEYS = ("overallScore", "overall_score", "score", "rating", "ratingScore")
+TIME_KEYS = ("reviewTime", "timestamp", "createdAt", "created_at", "submitTime", "reviewDate")
+ID_KEYS = ("reviewId", "review_id", "id")
+NESTED_AUTHOR_KEYS = ("reviewer", "user", "author", "reviewerProfile")
+HOTEL_ID_RE = re.compile(r'(\d{6,})(?:[/?#]|$)')
+
+
+def review_key(review):
+    """Dedup key for a parsed review, shared by every Traveloka backend"""
+    return f"{review['author_name']}_{review['content'][:100]}"
+
+
+def extract_hotel_id(hotel_url):
+    match = HOTEL_ID_RE.search(hotel_url or "")
+    return match.group(1) if match else None
+
+
+def hotel_key(hotel_url):
+    """Stable hotel identity: numeric Traveloka hotel id, else the URL without query/fragment"""
+    return extract_hotel_id(hotel_url) or re.split(r'[?#]', hotel_url or "", maxsplit=1)[0].rstrip("/")
+
+
+def generate_external_id(hotel_url, author_name, content, prefix="tvl"):
+    """
+    Deterministic external_id for a Traveloka review. Dates on the page are
+    relative ("3 days ago") and the DOM has no review id, so only author and
+    content are stable across runs and capture modes. The hotel is part of
+    the hash: the same author can post the same short text for two hotels.
+    """
+    raw = f"{prefix}|{hotel_key(hotel_url)}|{author_name.strip()}|{content.strip()[:300]}"
+    return hashlib.md5(raw.encode("utf-8")).hexdigest()
+
+
+def _pick(record, keys):
+    for key in keys:
+        value = record.get(key)
+        if value not in (None, ""):
+            return value
+    return None
+
+
+def _author_of(record):
+    author = _pick(record, AUTHOR_KEYS)
+    if author:
+        return author
+    for key in NESTED_AUTHOR_KEYS:
+        nested = record.get(key)
+        if isinstance(nested, dict):
+            author = _pick(nested, ("name", "displayName", "fullName", "userName"))
+            if author:
+                return author
+    return None
+
+
+def _is_review(record):
+    content = _pick(record, CONTENT_KEYS)
+    return isinstance(content, str) and bool(_author_of(record)) and _pick(record, RATING_KEYS) is not None
+
+
+def find_review_records(node):
+    """Walk a decoded JSON payload and yield every dict that looks like a review"""
+    if isinstance(node, dict):
+        if _is_review(node):
+            yield node
+            return
+        for value in node.values():
+            yield from find_review_records(value)
+    elif isinstance(node, list):
+        for value in node:
+            yield from find_review_records(value)
+
+
+def parse_rating(value):
+    """Numeric rating on a 0-10 scale; accepts numbers or text such as '9,2' or '92'"""
+    if isinstance(value, dict):
+        value = _pick(value, ("value", "score", "overall"))
+    try:
+        if isinstance(value, str):
+            value = re.sub(r'[^\d,.]', '', value).replace(',', '.')
+        rating = float(value)
+        if rating > 10:
+            rating = rating / 10
+        return rating
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_timestamp(value):
+    """Epoch seconds/milliseconds or ISO 8601 string to datetime (local time)"""
+    if isinstance(value, dict):
+        value = _pick(value, ("timestamp", "value", "epoch"))
+    if value is None:
+        return None
+    try:
+        if isinstance(value, str) and not value.strip().isdigit():
+            text = value.strip()
+            if text.endswith("Z"):
+                text = text[:-1] + "+00:00"
+            parsed = datetime.fromisoformat(text)
+            return parsed.astimezone().replace(tzinfo=None) if parsed.tzinfo else parsed
+        epoch = float(value)
+        if epoch > 1e12:
+            epoch = epoch / 1000
+        return datetime.fromtimestamp(epoch)
+    except (TypeError, ValueError, OverflowError, OSError):
+        return None
+
+
+def parse_review_record(record, capture="network"):
+    """
+    Map one raw review dict to the crawler's review format.
+    external_id is assigned at store time (ingest_traveloka), where the hotel is known.
+    """
+    author_name = str(_author_of(record) or "").strip()
+    content = str(_pick(record, CONTENT_KEYS) or "").strip()
+    raw_rating = _pick(record, RATING_KEYS)
+    raw_time = _pick(record, TIME_KEYS)
+    if not author_name or not content:
+        return None
+
+    return {
+        "author_name": author_name,
+        "content": content,
+        "rating": parse_rating(raw_rating),
+        "review_created_at": parse_timestamp(raw_time),
+        "metadata": {
+            "source": "traveloka",
+            "capture": capture,
+            "review_id": _pick(record, ID_KEYS),
+            "raw_date_text": None if raw_time is None else str(raw_time),
+            "original_rating": None if raw_rating is None else str(raw_rating),
+        }
+    }
+
+
+# ---------------------------------------------------------------------
+# DOM review cards (EXTRACT_REVIEWS_SCRIPT items)
+# ---------------------------------------------------------------------
+def get_review_data(review_item, reference=None):
+    """
+    Build a review record from one item returned by EXTRACT_REVIEWS_SCRIPT.
+    reference: waktu acuan untuk tanggal relatif (default sekarang; replay pakai landed_at)
+    """
+    missing = [k for k in ("author_name", "content", "rating_text", "date_text") if review_item.get(k) is None]
+    if missing:
+        debug("Error extracting review data: missing %s", ", ".join(missing))
+        return None
+
+    author_name = review_item["author_name"]
+    content = review_item["content"]
+    rating_text = review_item["rating_text"]
+    review_date_text = review_item["date_text"]
+    
+    # Extract numeric rating only
+    rating = extract_numeric_rating(rating_text)
+    review_date = parse_review_date(review_date_text, reference)
+    
+    return {
+        "author_name": author_name,
+        "content": content,
+        "rating": rating,
+        "review_created_at": review_date,
+        "metadata": {
+            "source": "traveloka",
+            "raw_date_text": review_date_text,
+            "original_rating": rating_text
+        }
+    }
+
+
+def extract_numeric_rating(rating_text):
+    """Extract numeric rating from various formats"""
+    try:
+        # Remove non-numeric characters except comma and dot
+        cleaned = re.sub(r'[^\d,.]', '', rating_text)
+        
+        # Replace comma with dot for decimal numbers
+        cleaned = cleaned.replace(',', '.')
+        
+        # Convert to float
+        rating = float(cleaned)
+        
+        # If rating is more than 10, divide by 10 (e.g., 97 -> 9.7)
+        if rating > 10:
+            rating = rating / 10
+        
+        return rating
+    except:
+        return None
+
+
+def parse_review_date(date_text, reference=None):
+    try:
+        parts = re.sub(r'\b(?:Reviewed|ago)\b|\(s\)', '', date_text).strip().split(' ')
+        if (len(parts) != 2) or (not parts[0].isdigit()) or (parts[1] not in ['day', 'days', 'week', 'weeks', 'month', 'months']):
+            return None
+        
+        if parts[1] in ['day', 'days']:
+            delta_args = {'days': int(parts[0])}
+        elif parts[1] in ['week', 'weeks']:
+            delta_args = {'weeks': int(parts[0])}
+        else:
+            delta_args = {'days': int(parts[0]) * 30}
+        
+        return ((reference or datetime.today()) - timedelta(**delta_args)).date()
+    except:
+        return None
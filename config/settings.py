@@ -8,13 +8,74 @@ DB_PORT = int(os.getenv("DB_PORT", 3306))
 DB_USER = os.getenv("DB_USER", "root")
 DB_PASSWORD = os.getenv("DB_PASSWORD", "")
 DB_NAME = os.getenv("DB_NAME", "omni_feedback_db")
+DB_BATCH_SIZE = int(os.getenv("DB_BATCH_SIZE", 500))
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", 30))
+DB_POOL_IDLE_TIMEOUT = int(os.getenv("DB_POOL_IDLE_TIMEOUT", 300))
+DEDUP_MODE = os.getenv("DEDUP_MODE", "lookup")  # lookup | preload
+DEDUP_BLOOM_THRESHOLD = int(os.getenv("DEDUP_BLOOM_THRESHOLD", 1000000))
+DEDUP_LOOKUP_CHUNK = int(os.getenv("DEDUP_LOOKUP_CHUNK", 1000))
 
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 GOOGLE_PLACE_ID = os.getenv("GOOGLE_PLACE_ID")
 GOOGLE_BASE_URL = os.getenv("GOOGLE_BASE_URL")
+TRANSLATION_CACHE_PATH = os.getenv("TRANSLATION_CACHE_PATH", ".cache/translations.sqlite3")
+TRANSLATION_CACHE_SIZE = int(os.getenv("TRANSLATION_CACHE_SIZE", 10000))
+TRANSLATION_CACHE_TTL_DAYS = int(os.getenv("TRANSLATION_CACHE_TTL_DAYS", 90))
 TRAVELOKA_BASE_URL = os.getenv("TRAVELOKA_BASE_URL")
+TRAVELOKA_HOTEL_URLS = [u.strip() for u in os.getenv("TRAVELOKA_HOTEL_URLS", "").split(",") if u.strip()] or (
+    [TRAVELOKA_BASE_URL] if TRAVELOKA_BASE_URL else []
+)
+TRAVELOKA_BROWSER_WORKERS = int(os.getenv("TRAVELOKA_BROWSER_WORKERS", 2))
+TRAVELOKA_EARLY_STOP = os.getenv("TRAVELOKA_EARLY_STOP", "true").lower() in ("1", "true", "yes")
+TRAVELOKA_KNOWN_STOP_RATIO = float(os.getenv("TRAVELOKA_KNOWN_STOP_RATIO", 0.8))
+TRAVELOKA_RESUME = os.getenv("TRAVELOKA_RESUME", "true").lower() in ("1", "true", "yes")
+TRAVELOKA_FLUSH_PER_PAGE = os.getenv("TRAVELOKA_FLUSH_PER_PAGE", "true").lower() in ("1", "true", "yes")
+CRAWL_CHECKPOINT_PATH = os.getenv("CRAWL_CHECKPOINT_PATH", ".cache/crawl_checkpoints.json")
+CRAWL_CHECKPOINT_MAX_AGE_HOURS = float(os.getenv("CRAWL_CHECKPOINT_MAX_AGE_HOURS", 24))  # 0 = tidak pernah expired
+TRAVELOKA_BACKEND = os.getenv("TRAVELOKA_BACKEND", "selenium")  # selenium | http
+TRAVELOKA_REVIEW_API_URL = os.getenv("TRAVELOKA_REVIEW_API_URL")
+TRAVELOKA_HTTP_PAGE_SIZE = int(os.getenv("TRAVELOKA_HTTP_PAGE_SIZE", 20))
+TRAVELOKA_LEAN_PROFILE = os.getenv("TRAVELOKA_LEAN_PROFILE", "true").lower() in ("1", "true", "yes")
+TRAVELOKA_CAPTURE_MODE = os.getenv("TRAVELOKA_CAPTURE_MODE", "dom")  # dom | network
+TRAVELOKA_REVIEW_API_PATTERN = os.getenv("TRAVELOKA_REVIEW_API_PATTERN", "/ugc/review")
+TRAVELOKA_PAGE_LOAD_TIMEOUT = int(os.getenv("TRAVELOKA_PAGE_LOAD_TIMEOUT", 20))
+TRAVELOKA_REVIEW_WAIT_TIMEOUT = int(os.getenv("TRAVELOKA_REVIEW_WAIT_TIMEOUT", 10))
+TRAVELOKA_SCROLL_WAIT_TIMEOUT = int(os.getenv("TRAVELOKA_SCROLL_WAIT_TIMEOUT", 4))
+TRAVELOKA_REVIEW_TAB_TIMEOUT = int(os.getenv("TRAVELOKA_REVIEW_TAB_TIMEOUT", 15))  # total, semua selector
+TRAVELOKA_NEXT_BUTTON_TIMEOUT = int(os.getenv("TRAVELOKA_NEXT_BUTTON_TIMEOUT", 5))  # total, semua selector
+TRAVELOKA_NETWORK_IDLE_MS = int(os.getenv("TRAVELOKA_NETWORK_IDLE_MS", 500))
 TRIPADVISOR_BASE_URL = os.getenv("TRIPADVISOR_BASE_URL")
 
 FB_BASE_URL = os.getenv("FB_BASE_URL")
 FB_PAGE_ID = os.getenv("FB_PAGE_ID")
-FB_ACCESS_TOKEN = os.getenv("FB_ACCESS_TOKEN")
\ No newline at end of file
+FB_ACCESS_TOKEN = os.getenv("FB_ACCESS_TOKEN")
+FB_FETCH_CONCURRENCY = int(os.getenv("FB_FETCH_CONCURRENCY", 4))
+FB_EXPAND_COMMENTS = os.getenv("FB_EXPAND_COMMENTS", "true").lower() in ("1", "true", "yes")
+FB_STREAM_CHUNK_SIZE = int(os.getenv("FB_STREAM_CHUNK_SIZE", 200))
+
+PIPELINE_CONCURRENT = os.getenv("PIPELINE_CONCURRENT", "false").lower() in ("1", "true", "yes")
+PIPELINE_MAX_WORKERS = int(os.getenv("PIPELINE_MAX_WORKERS", 3))
+
+INCREMENTAL_INGESTION = os.getenv("INCREMENTAL_INGESTION", "false").lower() in ("1", "true", "yes")
+INCREMENTAL_OVERLAP_MINUTES = int(os.getenv("INCREMENTAL_OVERLAP_MINUTES", 60))
+
+METRICS_JSON_PATH = os.getenv("METRICS_JSON_PATH", ".cache/metrics.json")
+METRICS_PROM_PATH = os.getenv("METRICS_PROM_PATH", ".cache/ingestion.prom")
+
+LOG_MODE = os.getenv("LOG_MODE", "dev")  # dev (warna, sinkron) | production (JSON, background writer)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+
+LANDING_ENABLED = os.getenv("LANDING_ENABLED", "true").lower() in ("1", "true", "yes")
+LANDING_ZONE_PATH = os.getenv("LANDING_ZONE_PATH", "landing")
+LANDING_SEGMENT_RECORDS = int(os.getenv("LANDING_SEGMENT_RECORDS", 1000))
+
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", 15))
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", 4))
+HTTP_RETRY_BUDGET = int(os.getenv("HTTP_RETRY_BUDGET", 30))  # total retry per channel per proses
+HTTP_BACKOFF_BASE = float(os.getenv("HTTP_BACKOFF_BASE", 1.0))
+HTTP_BACKOFF_MAX = float(os.getenv("HTTP_BACKOFF_MAX", 60.0))
+# request/detik per channel (token bucket), 0 = tanpa limit
+FB_RATE_LIMIT = float(os.getenv("FB_RATE_LIMIT", 10))
+GOOGLE_RATE_LIMIT = float(os.getenv("GOOGLE_RATE_LIMIT", 5))
+TRAVELOKA_HTTP_RATE_LIMIT = float(os.getenv("TRAVELOKA_HTTP_RATE_LIMIT", 2))
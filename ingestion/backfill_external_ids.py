@@ -0,0 +1,43 @@
+# filename: ingestion/backfill_external_ids.py
+# One-off: give existing Google Maps / Traveloka rows the same external_id
+# the ingestors now generate, so every channel uses the
+# (channel_id, external_id) upsert path instead of the legacy content check.
+# Traveloka rows are rekeyed even if they already have an external_id: the
+# ID now includes the hotel, and rows keeping the old ID would be inserted
+# again on the next crawl. Run this before the first crawl after upgrading.
+from utils.db import pooled_conn, get_or_create_channel, backfill_external_ids
+from utils.logger import info
+from channels.google_maps import generate_external_id as google_external_id
+from channels.traveloka_payload import generate_external_id as traveloka_external_id
+from config.settings import GOOGLE_BASE_URL, TRAVELOKA_BASE_URL
+
+
+def _google_id(row):
+    if not row["review_created_at"]:
+        return None
+    # review_created_at was stored as datetime.fromtimestamp(time), so this gives the original epoch back
+    return google_external_id(row["source_url"] or row["author_name"], row["review_created_at"].timestamp())
+
+
+def _traveloka_id(row):
+    if not row["author_name"] or not row["content"]:
+        return None
+    # rows from the single-hotel era may have no source_url
+    return traveloka_external_id(row["source_url"] or TRAVELOKA_BASE_URL, row["author_name"], row["content"])
+
+
+def backfill_all():
+    results = {}
+    with pooled_conn() as conn:
+        google_channel = get_or_create_channel(conn, name="Google Maps", type_="api", base_url=GOOGLE_BASE_URL)
+        info("🔁 Backfilling Google Maps external_id")
+        results["Google Maps"] = backfill_external_ids(conn, google_channel, _google_id)
+
+        traveloka_channel = get_or_create_channel(conn, name="Traveloka", type_="crawl", base_url=TRAVELOKA_BASE_URL)
+        info("🔁 Backfilling Traveloka external_id")
+        results["Traveloka"] = backfill_external_ids(conn, traveloka_channel, _traveloka_id, rekey=True)
+    return results
+
+
+if __name__ == "__main__":
+    print(backfill_all())
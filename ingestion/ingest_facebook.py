@@ -2,14 +2,19 @@
 import hashlib
 from datetime import datetime
 from utils.db import (
-    get_conn,
+    pooled_conn,
     get_or_create_channel,
-    insert_raw_feedback,
+    get_incremental_cutoff,
+    upsert_raw_feedback,
+    merge_feedback_stats,
+    print_feedback_summary,
+    is_older_than,
     update_channel_last_ingested
 )
-from utils.logger import info, error
-from channels.facebook import fetch_facebook_data
-from config.settings import FB_BASE_URL
+from utils.logger import debug, info, warn, error
+from utils.metrics import timer
+from channels.facebook import iter_facebook_comments
+from config.settings import FB_BASE_URL, FB_STREAM_CHUNK_SIZE, INCREMENTAL_INGESTION
 
 class FacebookIngestor:
     def __init__(self):
@@ -57,99 +62,117 @@ class FacebookIngestor:
         raw = f"{prefix}|{author}|{content}|{created_at}"
         return hashlib.md5(raw.encode("utf-8")).hexdigest()
 
-    def _transform_facebook_data(self, raw_data, channel_id):
+    def _iter_transformed(self, pages, channel_id, since=None, counts=None):
         """
-        Standardize Facebook data to ingestion format.
+        Standardize Facebook comments to ingestion format, one row at a time.
+        pages yields (post, comments) as produced by iter_facebook_comments.
         Keeps rating as None (Facebook has no numeric rating).
         If created_time can't be parsed, falls back to ingestion time but marks metadata.
+        since (incremental cutoff) drops comments created before it; counts["stale"] counts them.
         """
-        transformed_data = []
-        for post in raw_data:
+        for post, comments in pages:
             post_id = post.get("post_id")
             post_message = post.get("message", "") or ""
-            for comment in post.get("comments", []):
-                # Pull basic fields safely
-                author_name = (comment.get("from") or {}).get("name") or "Guest"
-                content = comment.get("message") or ""
-                raw_created = comment.get("created_time")
-
-                parsed_date = self._parse_iso_datetime(raw_created)
-                created_missing = False
-                if parsed_date is None:
-                    # DB requires a non-null review_created_at; fallback to ingestion time BUT mark metadata
-                    parsed_date = datetime.utcnow()
-                    created_missing = True
-
-                comment_id = comment.get("id")
-                if not comment_id or not str(comment_id).strip():
-                    # generate deterministic external id fallback
-                    comment_id = self._generate_external_id(author_name, content[:300], raw_created or parsed_date.isoformat())
-
-                transformed_comment = {
-                    "channel_id": channel_id,
-                    "external_id": comment_id,
-                    "author_name": author_name,
-                    "rating": None,  # Facebook does not provide a numeric rating
-                    "content": content,
-                    "source_url": f"https://facebook.com/{post_id}" if post_id else None,
-                    "review_created_at": parsed_date,
-                    "metadata": {
-                        "source": "facebook",
-                        "comment_id": comment.get("id"),
-                        "post_id": post_id,
-                        "post_message": post_message[:200],
-                        "original_data": comment,
-                        "created_time_raw": raw_created,
-                        "created_time_missing": created_missing
-                    }
+            for comment in comments:
+                transformed_comment = self._transform_comment(comment, post_id, post_message, channel_id, since)
+                if transformed_comment is None:
+                    if counts is not None:
+                        counts["stale"] = counts.get("stale", 0) + 1
+                elif transformed_comment["content"] and transformed_comment["content"].strip():
+                    yield transformed_comment
+                else:
+                    debug("⚠️ Skipping empty comment from %s (id=%s)",
+                          transformed_comment["author_name"], transformed_comment["external_id"])
+
+    def _transform_comment(self, comment, post_id, post_message, channel_id, since=None):
+        """One comment -> ingestion row; None if it is older than the incremental cutoff"""
+        with timer("transform", channel="facebook"):
+            # Pull basic fields safely
+            author_name = (comment.get("from") or {}).get("name") or "Guest"
+            content = comment.get("message") or ""
+            raw_created = comment.get("created_time")
+
+            parsed_date = self._parse_iso_datetime(raw_created)
+            created_missing = False
+            if parsed_date is None:
+                # DB requires a non-null review_created_at; fallback to ingestion time BUT mark metadata
+                parsed_date = datetime.utcnow()
+                created_missing = True
+            elif is_older_than(parsed_date, since):
+                return None
+
+            comment_id = comment.get("id")
+            if not comment_id or not str(comment_id).strip():
+                # generate deterministic external id fallback
+                comment_id = self._generate_external_id(author_name, content[:300], raw_created or parsed_date.isoformat())
+
+            transformed_comment = {
+                "channel_id": channel_id,
+                "external_id": comment_id,
+                "author_name": author_name,
+                "rating": None,  # Facebook does not provide a numeric rating
+                "content": content,
+                "source_url": f"https://facebook.com/{post_id}" if post_id else None,
+                "review_created_at": parsed_date,
+                "metadata": {
+                    "source": "facebook",
+                    "comment_id": comment.get("id"),
+                    "post_id": post_id,
+                    "post_message": post_message[:200],
+                    "original_data": comment,
+                    "created_time_raw": raw_created,
+                    "created_time_missing": created_missing
                 }
+            }
 
-                if transformed_comment["content"] and transformed_comment["content"].strip():
-                    transformed_data.append(transformed_comment)
-                else:
-                    info(f"⚠️ Skipping empty comment from {transformed_comment['author_name']} (id={comment_id})")
+            return transformed_comment
+
+    def _transform_facebook_data(self, raw_data, channel_id, since=None):
+        """List version of _iter_transformed for fetch_facebook_data output (post dicts with "comments")"""
+        counts = {"stale": 0}
+        pages = ((post, post.get("comments", [])) for post in raw_data)
+        transformed_data = list(self._iter_transformed(pages, channel_id, since=since, counts=counts))
+        if counts["stale"]:
+            info(f"⏭ Skipped {counts['stale']} comments older than incremental cutoff {since}")
         return transformed_data
 
-    def ingest(self, post_limit=3):
-        conn = None
+    def _get_channel_id(self, conn):
+        return get_or_create_channel(
+            conn,
+            name=self.channel_name,
+            type_=self.channel_type,
+            base_url=self.base_url
+        )
+
+    def _load_incremental_cutoff(self):
+        with pooled_conn() as conn:
+            since = get_incremental_cutoff(conn, self._get_channel_id(conn))
+        if since:
+            info(f"⏩ Incremental mode: fetching items since {since}")
+        else:
+            info("ℹ️ Incremental mode: no watermark yet, running full ingestion")
+        return since
+
+    def ingest(self, post_limit=3, incremental=INCREMENTAL_INGESTION, chunk_size=FB_STREAM_CHUNK_SIZE):
         try:
             info("🚀 STARTING FACEBOOK INGESTION PROCESS")
-            raw_data = fetch_facebook_data(limit=post_limit)
-            if not raw_data:
-                error("❌ No data available for ingestion")
-                return 0
-
-            conn = get_conn()
-            if not conn:
-                error("❌ Database connection failed")
-                return 0
-
-            channel_id = get_or_create_channel(
-                conn,
-                name=self.channel_name,
-                type_=self.channel_type,
-                base_url=self.base_url
-            )
-            if not channel_id:
-                error("❌ Failed to get or create Facebook channel")
-                return 0
-
-            info(f"📝 Using channel ID: {channel_id}")
-            info("🔄 Transforming Facebook data for database...")
-            final_data = self._transform_facebook_data(raw_data, channel_id)
-
-            if not final_data:
-                info("ℹ️ No valid comments found for ingestion")
-                return 0
-
-            info(f"📊 Transformed {len(final_data)} comments for insertion")
-            info("💾 Inserting data into database...")
-            inserted_count = insert_raw_feedback(conn, final_data)
-
-            # Update channel timestamp even if inserted_count == 0 (we polled)
-            update_channel_last_ingested(conn, channel_id)
-
-            info(f"✅ FACEBOOK INGESTION COMPLETED - {inserted_count} records inserted/updated")
+            since = self._load_incremental_cutoff() if incremental else None
+            fetch_errors = []
+            pages = iter_facebook_comments(limit=post_limit, since=since, errors=fetch_errors)
+            inserted_count, complete = self._store_stream(pages, since=since, chunk_size=chunk_size)
+
+            # Update channel timestamp even if inserted_count == 0 (we polled), but only
+            # when nothing was lost: otherwise the next incremental run would skip it
+            if complete and not fetch_errors:
+                with pooled_conn() as conn:
+                    update_channel_last_ingested(conn, self._get_channel_id(conn))
+            else:
+                reasons = []
+                if fetch_errors:
+                    reasons.append(f"{len(fetch_errors)} fetch error(s)")
+                if not complete:
+                    reasons.append("write incomplete")
+                warn(f"⚠ last_ingested_at not advanced: {', '.join(reasons)}")
             return inserted_count
 
         except Exception as e:
@@ -157,12 +180,56 @@ class FacebookIngestor:
             import traceback
             error(f"Stack trace: {traceback.format_exc()}")
             return 0
-        finally:
-            if conn:
-                conn.close()
-                info("🔚 Database connection closed")
 
-
-def ingest_facebook(post_limit=3):
+    def _store_stream(self, pages, since=None, chunk_size=FB_STREAM_CHUNK_SIZE):
+        """
+        fetch -> transform -> insert as one stream: rows are written every
+        chunk_size comments, so memory is bounded by the chunk (plus the page
+        being read), not by the page's comment history. A pooled connection
+        is only held while a chunk is written.
+        Returns (inserted_count, complete); complete is True when no chunk failed,
+        including a quiet run with nothing to write. The caller owns the watermark.
+        """
+        with pooled_conn() as conn:
+            channel_id = self._get_channel_id(conn)
+        if not channel_id:
+            error("❌ Failed to get or create Facebook channel")
+            return 0, False
+        info(f"📝 Using channel ID: {channel_id}")
+
+        counts = {"stale": 0}
+        stats = {}
+        chunk = []
+        total_rows = 0
+        for row in self._iter_transformed(pages, channel_id, since=since, counts=counts):
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                total_rows += self._write_chunk(chunk, since, stats)
+                chunk = []
+        if chunk:
+            total_rows += self._write_chunk(chunk, since, stats)
+
+        if counts["stale"]:
+            info(f"⏭ Skipped {counts['stale']} comments older than incremental cutoff {since}")
+        if not total_rows:
+            info("ℹ️ No valid comments found for ingestion")
+            return 0, True
+
+        info(f"📊 Streamed {total_rows} comments into raw_feedback")
+        inserted_count = print_feedback_summary(stats)
+        if stats.get("failed"):
+            error(f"❌ {stats['failed']} comments failed to write")
+
+        info(f"✅ FACEBOOK INGESTION COMPLETED - {inserted_count} records inserted/updated")
+        return inserted_count, not stats.get("failed")
+
+    def _write_chunk(self, chunk, since, stats):
+        info(f"💾 Writing chunk of {len(chunk)} comments...")
+        with pooled_conn() as conn:
+            merge_feedback_stats(stats, upsert_raw_feedback(conn, chunk, min_created_at=since))
+        return len(chunk)
+
+
+def ingest_facebook(post_limit=3, incremental=INCREMENTAL_INGESTION, chunk_size=FB_STREAM_CHUNK_SIZE):
     ingestor = FacebookIngestor()
-    return ingestor.ingest(post_limit)
+    return ingestor.ingest(post_limit, incremental=incremental, chunk_size=chunk_size)
@@ -1,21 +1,23 @@
 from datetime import datetime
-from utils.logger import info, error
+from utils.logger import info, warn, error
+from utils.metrics import timer
 from utils.db import (
-    get_conn,
+    pooled_conn,
     get_or_create_channel,
-    insert_raw_feedback,
+    get_incremental_cutoff,
+    upsert_raw_feedback,
+    print_feedback_summary,
+    is_older_than,
     update_channel_last_ingested,
 )
 from channels.google_maps import fetch_google_reviews, process_google_reviews
-from config.settings import GOOGLE_BASE_URL
+from config.settings import GOOGLE_BASE_URL, INCREMENTAL_INGESTION
 
 
-def ingest_google():
+def ingest_google(incremental=INCREMENTAL_INGESTION):
     """
     Main ingestion pipeline: fetch → process → store → update timestamp.
     """
-    conn = None
-
     try:
         info("=" * 60)
         info("🚀 STARTING GOOGLE MAPS INGESTION")
@@ -34,67 +36,21 @@ def ingest_google():
         # ---------------------------------------------------------------------
         # 2. DB CONNECTION
         # ---------------------------------------------------------------------
-        conn = get_conn()
-        if not conn:
-            error("❌ Failed to connect to database")
-            return 0
-        info("💾 Connected to database")
-
-        # ---------------------------------------------------------------------
-        # 3. CHANNEL SETUP
-        # ---------------------------------------------------------------------
-        channel_id = get_or_create_channel(
-            conn,
-            name="Google Maps",
-            type_="api",
-            base_url=GOOGLE_BASE_URL,
-        )
-
-        if not channel_id:
-            error("❌ Failed to create/find channel")
-            return 0
-
-        info(f"🏷️ Channel ID: {channel_id}")
-
-        # ---------------------------------------------------------------------
-        # 4. PROCESS REVIEWS
-        # ---------------------------------------------------------------------
-        processed = process_google_reviews(raw_reviews)
-        if not processed:
-            error("❌ No valid reviews after processing")
-            return 0
-
-        info(f"📝 Reviews ready for DB: {len(processed)}")
-
-        # ---------------------------------------------------------------------
-        # 5. TRANSFORM & INSERT
-        # ---------------------------------------------------------------------
-        transformed = []
-        for r in processed:
-            transformed.append({
-                "channel_id": channel_id,
-                "author_name": r["author_name"],
-                "rating": r["rating"],
-                "content": r["content"],
-                "source_url": r["source_url"],
-                "review_created_at": r["review_created_at"],
-                "metadata": r["metadata"],
-            })
-
-        inserted_count = insert_raw_feedback(conn, transformed)
-
-        # ---------------------------------------------------------------------
-        # 6. UPDATE LAST INGESTED
-        # ---------------------------------------------------------------------
-        if update_channel_last_ingested(conn, channel_id):
-            info("🕒 Channel last_ingested_at updated")
-        else:
-            error("❌ Failed to update last_ingested_at")
-
-        info("=" * 60)
-        info(f"✅ INGESTION COMPLETED — Inserted {inserted_count} reviews")
-        info("=" * 60)
-
+        with pooled_conn() as conn:
+            info("💾 Connected to database")
+            inserted_count, complete = _store_google_reviews(conn, raw_reviews, incremental=incremental)
+
+            # -----------------------------------------------------------------
+            # 6. UPDATE LAST INGESTED (hanya kalau semua row ter-commit)
+            # -----------------------------------------------------------------
+            if complete:
+                if update_channel_last_ingested(conn, _get_channel_id(conn)):
+                    info("🕒 Channel last_ingested_at updated")
+                else:
+                    error("❌ Failed to update last_ingested_at")
+            else:
+                warn("⚠ last_ingested_at not advanced: channel setup or a write failed")
+        info("🔚 DB connection returned to pool")
         return inserted_count
 
     except Exception as e:
@@ -104,7 +60,75 @@ def ingest_google():
         error(traceback.format_exc())
         return 0
 
-    finally:
-        if conn:
-            conn.close()
-            info("🔚 DB connection closed")
+
+def _get_channel_id(conn):
+    return get_or_create_channel(conn, name="Google Maps", type_="api", base_url=GOOGLE_BASE_URL)
+
+
+def _store_google_reviews(conn, raw_reviews, incremental=False, allow_remote=True):
+    """
+    Channel setup → process → insert, di atas koneksi pool.
+    Return (inserted_count, complete): complete=True jika tidak ada chunk yang
+    gagal, termasuk run tanpa data baru (0 row). Watermark diurus caller
+    (ingest_google); reprocess tidak pernah menggesernya.
+    allow_remote=False (reprocess): translate hanya dari deteksi lokal + cache.
+    """
+    # ---------------------------------------------------------------------
+    # 3. CHANNEL SETUP
+    # ---------------------------------------------------------------------
+    channel_id = _get_channel_id(conn)
+
+    if not channel_id:
+        error("❌ Failed to create/find channel")
+        return 0, False
+
+    info(f"🏷️ Channel ID: {channel_id}")
+
+    since = get_incremental_cutoff(conn, channel_id) if incremental else None
+    if since:
+        info(f"⏩ Incremental mode: skipping reviews older than {since}")
+        raw_reviews = [
+            r for r in raw_reviews
+            if not r.get("time") or not is_older_than(datetime.fromtimestamp(r["time"]), since)
+        ]
+        if not raw_reviews:
+            info("ℹ️ No new reviews since last ingestion")
+            return 0, True
+
+    # ---------------------------------------------------------------------
+    # 4. PROCESS REVIEWS
+    # ---------------------------------------------------------------------
+    with timer("transform", channel="google"):
+        processed = process_google_reviews(raw_reviews, allow_remote=allow_remote)
+    if not processed:
+        error("❌ No valid reviews after processing")
+        return 0, True
+
+    info(f"📝 Reviews ready for DB: {len(processed)}")
+
+    # ---------------------------------------------------------------------
+    # 5. TRANSFORM & INSERT
+    # ---------------------------------------------------------------------
+    transformed = []
+    for r in processed:
+        transformed.append({
+            "channel_id": channel_id,
+            "external_id": r.get("external_id"),
+            "author_name": r["author_name"],
+            "rating": r["rating"],
+            "content": r["content"],
+            "source_url": r["source_url"],
+            "review_created_at": r["review_created_at"],
+            "metadata": r["metadata"],
+        })
+
+    stats = upsert_raw_feedback(conn, transformed, min_created_at=since)
+    inserted_count = print_feedback_summary(stats)
+    if stats["failed"]:
+        error(f"❌ {stats['failed']} reviews failed to write")
+
+    info("=" * 60)
+    info(f"✅ INGESTION COMPLETED — Inserted {inserted_count} reviews")
+    info("=" * 60)
+
+    return inserted_count, not stats["failed"]
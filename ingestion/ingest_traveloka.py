@@ -1,72 +1,169 @@
-from utils.db import get_conn, get_or_create_channel, insert_raw_feedback, update_channel_last_ingested
+from utils.db import (
+    pooled_conn,
+    fetch_review_key_rows,
+    get_or_create_channel,
+    insert_raw_feedback,
+    update_channel_last_ingested,
+)
 from utils.logger import info, error, warn
-from channels.traveloka import crawl_traveloka_reviews
-from config.settings import TRAVELOKA_BASE_URL
-
-
-def ingest_traveloka(max_pages=5):
-    conn = get_conn()
-
+from utils.metrics import timer, bind_channel
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from channels.traveloka_payload import generate_external_id, review_key
+from utils.checkpoint import CrawlCheckpoint
+from config.settings import (
+    TRAVELOKA_BASE_URL,
+    TRAVELOKA_BACKEND,
+    TRAVELOKA_HOTEL_URLS,
+    TRAVELOKA_BROWSER_WORKERS,
+    TRAVELOKA_EARLY_STOP,
+    TRAVELOKA_RESUME,
+    TRAVELOKA_FLUSH_PER_PAGE,
+)
+
+
+def get_crawler(backend=TRAVELOKA_BACKEND):
+    """
+    selenium: Chrome crawler (channels.traveloka)
+    http: browser-free crawler (channels.traveloka_http)
+    Imported lazily so the http backend does not need selenium installed.
+    """
+    if backend == "http":
+        from channels.traveloka_http import crawl_traveloka_reviews_http
+        return crawl_traveloka_reviews_http
+    from channels.traveloka import crawl_traveloka_reviews
+    return crawl_traveloka_reviews
+
+
+def _get_channel_id(conn):
+    return get_or_create_channel(conn, name="Traveloka", type_="crawl", base_url=TRAVELOKA_BASE_URL)
+
+
+def load_known_review_keys():
+    """
+    Keys (review_key format) of every Traveloka review already in raw_feedback,
+    so the crawler can stop paginating once it reaches stored reviews.
+    """
+    with pooled_conn() as conn:
+        rows = fetch_review_key_rows(conn, _get_channel_id(conn))
+    keys = {
+        review_key({"author_name": row["author_name"], "content": row["content"] or ""})
+        for row in rows
+    }
+    info(f"Loaded {len(keys)} known Traveloka review keys")
+    return keys
+
+
+class PageFlusher:
+    """
+    on_page callback for the crawlers: writes each completed page to
+    raw_feedback immediately instead of holding everything until the end.
+    """
+    def __init__(self):
+        self.total = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, hotel_url, hotel_name, page_reviews):
+        # called from crawler worker threads, which have no channel bound yet
+        with bind_channel("traveloka"), pooled_conn() as conn:
+            count = _store_traveloka_reviews(conn, hotel_name, page_reviews, hotel_url=hotel_url)
+        with self._lock:
+            self.total += count
+
+
+def _crawl_options(early_stop, resume, flush):
+    return {
+        "known_keys": load_known_review_keys() if early_stop else None,
+        "checkpoint": CrawlCheckpoint() if resume else None,
+        "on_page": PageFlusher() if flush else None,
+    }
+
+
+def iter_crawl_results(hotel_urls, max_pages=5, backend=TRAVELOKA_BACKEND, workers=TRAVELOKA_BROWSER_WORKERS,
+                       **crawl_options):
+    """
+    Yield (hotel_url, hotel_name, reviews_data) per hotel as each one finishes.
+    selenium: pool of long-lived browsers; http: thread pool of plain HTTP crawls.
+    crawl_options (known_keys, checkpoint, on_page) are passed to the crawler.
+    """
+    if backend == "http":
+        crawl = get_crawler(backend)
+        with ThreadPoolExecutor(max_workers=max(int(workers), 1)) as executor:
+            futures = {
+                executor.submit(crawl, url, max_pages=max_pages, **crawl_options): url
+                for url in hotel_urls
+            }
+            for future in as_completed(futures):
+                yield (futures[future], *future.result())
+        return
+
+    from channels.traveloka import iter_crawl_traveloka
+    yield from iter_crawl_traveloka(hotel_urls, max_pages=max_pages, workers=workers, **crawl_options)
+
+
+def ingest_traveloka_many(hotel_urls=TRAVELOKA_HOTEL_URLS, max_pages=5, backend=TRAVELOKA_BACKEND,
+                          workers=TRAVELOKA_BROWSER_WORKERS, early_stop=TRAVELOKA_EARLY_STOP,
+                          resume=TRAVELOKA_RESUME, flush=TRAVELOKA_FLUSH_PER_PAGE):
+    """
+    Multi-hotel ingestion: hotels are crawled in parallel and each hotel's
+    reviews are written to raw_feedback as soon as that hotel (or, with
+    flush, each page) finishes.
+    """
+    info(f"Starting Traveloka ingestion for {len(hotel_urls)} hotels (backend={backend}, workers={workers})")
+    total = 0
+    options = _crawl_options(early_stop, resume, flush)
+    flusher = options["on_page"]
+    for hotel_url, hotel_name, reviews_data in iter_crawl_results(hotel_urls, max_pages, backend, workers, **options):
+        info(f"Hotel Name: {hotel_name}, Reviews Count: {len(reviews_data)} ({hotel_url})")
+        if flusher:
+            continue
+        if not reviews_data:
+            error(f"No reviews data to ingest for {hotel_url}")
+            continue
+        try:
+            with pooled_conn() as conn:
+                total += _store_traveloka_reviews(conn, hotel_name, reviews_data, hotel_url=hotel_url)
+        except Exception as e:
+            error(f"Traveloka ingestion failed for {hotel_url}: {e}")
+
+    if flusher:
+        total = flusher.total
+    info(f"Traveloka multi-hotel ingestion completed - {total} records inserted")
+    return total
+
+
+def ingest_traveloka(max_pages=5, backend=TRAVELOKA_BACKEND, early_stop=TRAVELOKA_EARLY_STOP,
+                     resume=TRAVELOKA_RESUME, flush=TRAVELOKA_FLUSH_PER_PAGE):
     try:
+        if not TRAVELOKA_HOTEL_URLS:
+            error("No Traveloka hotel configured (TRAVELOKA_HOTEL_URLS / TRAVELOKA_BASE_URL)")
+            return 0
+        if len(TRAVELOKA_HOTEL_URLS) > 1:
+            return ingest_traveloka_many(
+                TRAVELOKA_HOTEL_URLS, max_pages=max_pages, backend=backend,
+                early_stop=early_stop, resume=resume, flush=flush,
+            )
+
         info("Starting Traveloka ingestion")
 
-        info(f"Crawling data from: {TRAVELOKA_BASE_URL}")
-        hotel_name, reviews_data = crawl_traveloka_reviews(TRAVELOKA_BASE_URL, max_pages=max_pages)
+        hotel_url = TRAVELOKA_HOTEL_URLS[0]
+        info(f"Crawling data from: {hotel_url} (backend={backend})")
+        options = _crawl_options(early_stop, resume, flush)
+        crawl = get_crawler(backend)
+        hotel_name, reviews_data = crawl(hotel_url, max_pages=max_pages, **options)
 
         info(f"Hotel Name: {hotel_name}, Reviews Count: {len(reviews_data)}")
+        if options["on_page"]:
+            info(f"Traveloka ingestion completed - {options['on_page'].total} records flushed page by page")
+            return options["on_page"].total
+
         if not reviews_data:
             error("No reviews data to ingest")
             return 0
 
-        info("Getting or creating Traveloka channel")
-        channel_id = get_or_create_channel(conn, name="Traveloka", type_="crawl", base_url=TRAVELOKA_BASE_URL)
-        if not channel_id:
-            error("Failed to get or create channel")
-            return 0
-        info(f"Channel ID: {channel_id}")
-
-        transformed_reviews = []
-        valid_count = 0
-        invalid_count = 0
-
-        for review in reviews_data:
-            author_name = review.get("author_name", "").strip()
-            content = review.get("content", "").strip()
-            rating = review.get("rating")
-            review_date = review.get("review_created_at")
-            metadata = review.get("metadata", {})
-
-            if not author_name or not content or rating is None or not review_date:
-                warn(f"Skipping invalid review: {author_name}")
-                invalid_count += 1
-                continue
-
-            transformed_reviews.append({
-                "channel_id": channel_id,
-                "author_name": author_name,
-                "rating": rating,
-                "content": content,
-                "source_url": TRAVELOKA_BASE_URL,
-                "review_created_at": review_date,
-                "metadata": {
-                    **metadata,
-                    "hotel_name": hotel_name,
-                    "source_type": "crawl"
-                }
-            })
-            valid_count += 1
-
-        info(f"Transformation Summary: {valid_count} valid, {invalid_count} invalid")
-        if not transformed_reviews:
-            error("No valid reviews after transformation")
-            return 0
-
-        info("Inserting data into database")
-        inserted_count = insert_raw_feedback(conn, transformed_reviews)
-
-        update_channel_last_ingested(conn, channel_id)
-
-        info(f"Traveloka ingestion completed - {inserted_count} records inserted")
+        with pooled_conn() as conn:
+            inserted_count = _store_traveloka_reviews(conn, hotel_name, reviews_data, hotel_url=hotel_url)
+        info("Database connection returned to pool")
         return inserted_count
 
     except Exception as e:
@@ -75,12 +172,73 @@ def ingest_traveloka(max_pages=5):
         error(f"Stack trace: {traceback.format_exc()}")
         return 0
 
-    finally:
-        if conn:
-            conn.close()
-            info("Database connection closed")
+
+def _store_traveloka_reviews(conn, hotel_name, reviews_data, hotel_url=TRAVELOKA_BASE_URL, update_watermark=True):
+    info("Getting or creating Traveloka channel")
+    channel_id = _get_channel_id(conn)
+    if not channel_id:
+        error("Failed to get or create channel")
+        return 0
+    info(f"Channel ID: {channel_id}")
+
+    with timer("transform", channel="traveloka"):
+        transformed_reviews, valid_count, invalid_count = _transform_reviews(
+            channel_id, hotel_name, reviews_data, hotel_url
+        )
+
+    info(f"Transformation Summary: {valid_count} valid, {invalid_count} invalid")
+    if not transformed_reviews:
+        error("No valid reviews after transformation")
+        return 0
+
+    info("Inserting data into database")
+    inserted_count = insert_raw_feedback(conn, transformed_reviews)
+
+    if update_watermark:
+        update_channel_last_ingested(conn, channel_id)
+
+    info(f"Traveloka ingestion completed - {inserted_count} records inserted")
+    return inserted_count
+
+
+def _transform_reviews(channel_id, hotel_name, reviews_data, hotel_url):
+    """Validate crawler output and map it to raw_feedback rows; returns (rows, valid, invalid)"""
+    transformed_reviews = []
+    valid_count = 0
+    invalid_count = 0
+
+    for review in reviews_data:
+        author_name = review.get("author_name", "").strip()
+        content = review.get("content", "").strip()
+        rating = review.get("rating")
+        review_date = review.get("review_created_at")
+        metadata = review.get("metadata", {})
+
+        if not author_name or not content or rating is None or not review_date:
+            warn(f"Skipping invalid review: {author_name}")
+            invalid_count += 1
+            continue
+
+        transformed_reviews.append({
+            "channel_id": channel_id,
+            # selalu dihitung ulang: review dari checkpoint lama masih membawa ID tanpa hotel
+            "external_id": generate_external_id(hotel_url, author_name, content),
+            "author_name": author_name,
+            "rating": rating,
+            "content": content,
+            "source_url": hotel_url,
+            "review_created_at": review_date,
+            "metadata": {
+                **metadata,
+                "hotel_name": hotel_name,
+                "source_type": "crawl"
+            }
+        })
+        valid_count += 1
+
+    return transformed_reviews, valid_count, invalid_count
 
 
 if __name__ == "__main__":
     inserted = ingest_traveloka()
-    print(f"Inserted {inserted} records")
\ No newline at end of file
+    print(f"Inserted {inserted} records")
@@ -0,0 +1,116 @@
+# filename: ingestion/reprocess.py
+# Replay raw payloads from the landing zone (utils.landing) through the
+# normal transform + upsert path, without calling any source API.
+# Use it after fixing a parser/transform bug: rows are rewritten by
+# (channel_id, external_id), unchanged rows are skipped by fingerprint, and
+# channels.last_ingested_at is never moved.
+#
+#     python -m ingestion.reprocess --channel facebook --from 2024-05-01 --to 2024-05-07
+#     python -m ingestion.reprocess --translate      # allow googletrans on cache miss
+import argparse
+from datetime import date, datetime
+from utils.db import pooled_conn
+from utils.logger import info, warn
+from utils.landing import landing_zone
+from utils.metrics import bind_channel
+
+CHANNELS = ("google", "facebook", "traveloka")
+
+
+def reprocess_google(since=None, until=None, translate=False):
+    """Replay place_details responses; translate=False -> hanya deteksi lokal + cache"""
+    from ingestion.ingest_google import _store_google_reviews
+
+    total = 0
+    with pooled_conn() as conn:
+        for record in landing_zone.iter_records("google", since, until, kinds={"place_details"}):
+            payload = record.get("payload") or {}
+            if payload.get("status") != "OK":
+                continue
+            reviews = (payload.get("result") or {}).get("reviews") or []
+            if not reviews:
+                continue
+            info("🔁 Replaying %d Google reviews landed at %s", len(reviews), record.get("landed_at"))
+            total += _store_google_reviews(conn, reviews, allow_remote=translate)[0]
+    return total
+
+
+def reprocess_facebook(since=None, until=None):
+    """Replay comment pages through the same streaming store as a live run"""
+    from ingestion.ingest_facebook import FacebookIngestor
+
+    pages = (
+        (record.get("post") or {}, record.get("payload") or [])
+        for record in landing_zone.iter_records("facebook", since, until, kinds={"comments_page"})
+    )
+    inserted_count, _ = FacebookIngestor()._store_stream(pages)
+    return inserted_count
+
+
+def _parse_traveloka_record(record):
+    from channels.traveloka_payload import get_review_data, parse_review_record
+
+    capture = record.get("capture") or "dom"
+    if capture == "dom":
+        # tanggal relatif ("3 days ago") dihitung dari waktu landing, bukan waktu replay
+        reference = datetime.fromisoformat(record["landed_at"]) if record.get("landed_at") else None
+        parsed = (get_review_data(item, reference) for item in record.get("payload") or [])
+    else:
+        parsed = (parse_review_record(item, capture=capture) for item in record.get("payload") or [])
+    return [review for review in parsed if review]
+
+
+def reprocess_traveloka(since=None, until=None):
+    """Replay review_items pages (DOM cards or JSON records) per hotel"""
+    from ingestion.ingest_traveloka import _store_traveloka_reviews
+
+    total = 0
+    with pooled_conn() as conn:
+        for record in landing_zone.iter_records("traveloka", since, until, kinds={"review_items"}):
+            reviews = _parse_traveloka_record(record)
+            if not reviews:
+                continue
+            info("🔁 Replaying %d Traveloka reviews for %s", len(reviews), record.get("hotel_name"))
+            total += _store_traveloka_reviews(
+                conn, record.get("hotel_name"), reviews,
+                hotel_url=record.get("hotel_url"), update_watermark=False,
+            )
+    return total
+
+
+def reprocess(channels=CHANNELS, since=None, until=None, translate=False):
+    """Replay landed payloads of the given channels; returns {channel: rows written}"""
+    runners = {
+        "google": lambda: reprocess_google(since, until, translate=translate),
+        "facebook": lambda: reprocess_facebook(since, until),
+        "traveloka": lambda: reprocess_traveloka(since, until),
+    }
+    results = {}
+    for channel in channels:
+        if not landing_zone.segments(channel, since, until):
+            warn("⚠ No landed %s segments between %s and %s", channel, since or "-", until or "-")
+            results[channel] = 0
+            continue
+        with bind_channel(channel):
+            results[channel] = runners[channel]()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reprocess landed raw payloads (no network)")
+    parser.add_argument("--channel", action="append", choices=CHANNELS,
+                        help="channel to replay (repeatable, default: all)")
+    parser.add_argument("--from", dest="since", type=date.fromisoformat, help="first landing day, YYYY-MM-DD")
+    parser.add_argument("--to", dest="until", type=date.fromisoformat, help="last landing day, YYYY-MM-DD")
+    parser.add_argument("--translate", action="store_true",
+                        help="call googletrans on translation cache miss (default: offline)")
+    args = parser.parse_args(argv)
+
+    results = reprocess(args.channel or CHANNELS, args.since, args.until, translate=args.translate)
+    for channel, count in results.items():
+        info("✅ %s: %d rows reprocessed", channel, count)
+    return results
+
+
+if __name__ == "__main__":
+    main()
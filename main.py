@@ -1,25 +1,73 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
 from ingestion.ingest_google import ingest_google
 from ingestion.ingest_traveloka import ingest_traveloka
 from ingestion.ingest_facebook import ingest_facebook
+from utils.metrics import metrics
+from utils.landing import landing_zone
+from config.settings import PIPELINE_CONCURRENT, PIPELINE_MAX_WORKERS
 
-def run_pipeline():
-    print("🚀 Starting data ingestion pipeline...")
-
-    steps = [
-        ("Google Reviews", ingest_google),
-        ("Facebook Reviews", ingest_facebook),
-        ("Traveloka Reviews", ingest_traveloka),
-    ]
 
-    for name, func in steps:
-        print(f"\n▶ Running step: {name}")
+def run_step(name, func, channel=None):
+    """
+    Jalankan satu step dan kembalikan hasil, exception dan durasinya.
+    channel = label metrics untuk semua timer/counter di thread step ini.
+    """
+    print(f"\n▶ Running step: {name}")
+    started = time.perf_counter()
+    result, exc = None, None
+    with metrics.bind_channel(channel), metrics.timer("step"):
         try:
-            func()
+            result = func()
             print(f"✔ Step completed: {name}")
         except Exception as e:
+            exc = e
+            metrics.incr("step_errors")
             print(f"❌ Error in step {name}: {e}")
+    return {
+        "name": name,
+        "result": result,
+        "error": exc,
+        "duration": time.perf_counter() - started,
+    }
+
+
+def print_summary(results, wall_time):
+    print("\n⏱ Step summary:")
+    for r in results:
+        status = "❌ failed" if r["error"] else "✔ ok"
+        print(f"   {r['name']:<20} {r['duration']:8.2f}s  {status}  result={r['result']}")
+    print(f"   {'Total wall time':<20} {wall_time:8.2f}s")
+
+
+def run_pipeline(concurrent=PIPELINE_CONCURRENT, max_workers=PIPELINE_MAX_WORKERS):
+    print("🚀 Starting data ingestion pipeline...")
+
+    steps = [
+        ("Google Reviews", ingest_google, "google"),
+        ("Facebook Reviews", ingest_facebook, "facebook"),
+        ("Traveloka Reviews", ingest_traveloka, "traveloka"),
+    ]
+
+    metrics.reset()
+    started = time.perf_counter()
+    if concurrent:
+        print(f"⚡ Concurrent mode: max_workers={max_workers}")
+        with ThreadPoolExecutor(max_workers=max(int(max_workers), 1)) as executor:
+            futures = [executor.submit(run_step, name, func, channel) for name, func, channel in steps]
+            results = [f.result() for f in futures]
+    else:
+        results = [run_step(name, func, channel) for name, func, channel in steps]
 
+    print_summary(results, time.perf_counter() - started)
+    landing_zone.close()
+    try:
+        for path in metrics.export():
+            print(f"📈 Metrics written: {path}")
+    except OSError as e:
+        print(f"❌ Failed to export metrics: {e}")
     print("\n🎉 Pipeline finished.")
+    return results
 
 if __name__ == "__main__":
-    run_pipeline()
\ No newline at end of file
+    run_pipeline()
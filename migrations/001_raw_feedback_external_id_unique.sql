@@ -0,0 +1,20 @@
+-- raw_feedback: UNIQUE KEY (channel_id, external_id)
+-- Dibutuhkan oleh utils.db.upsert_raw_feedback_sql (INSERT ... ON DUPLICATE KEY UPDATE).
+-- Tanpa key ini, row "changed" ikut ter-INSERT sebagai duplikat.
+--
+--     mysql -h $DB_HOST -u $DB_USER -p $DB_NAME < migrations/001_raw_feedback_external_id_unique.sql
+--
+-- Row legacy (external_id NULL) tidak terpengaruh: NULL tidak pernah bentrok di UNIQUE KEY.
+
+-- 1. buang duplikat (channel_id, external_id) yang sudah terlanjur ada, sisakan id terbaru
+DELETE older
+FROM raw_feedback AS older
+JOIN raw_feedback AS newer
+  ON newer.channel_id = older.channel_id
+ AND newer.external_id = older.external_id
+ AND newer.id > older.id
+WHERE older.external_id IS NOT NULL;
+
+-- 2. unique key untuk upsert
+ALTER TABLE raw_feedback
+    ADD UNIQUE KEY uq_raw_feedback_channel_external (channel_id, external_id);
@@ -0,0 +1,9 @@
+-- raw_feedback.fingerprint: md5 dari utils.dedup.row_fingerprint
+-- Dipakai oleh insert/upsert (utils.db) dan lookup dedup (utils.dedup):
+-- row dengan fingerprint sama tidak di-UPDATE. Jalankan setelah 001.
+--
+--     mysql -h $DB_HOST -u $DB_USER -p $DB_NAME < migrations/002_raw_feedback_fingerprint.sql
+--
+-- NULL untuk row lama: dianggap "changed", jadi terisi sekali saat row itu ter-ingest lagi.
+ALTER TABLE raw_feedback
+    ADD COLUMN fingerprint CHAR(32) NULL AFTER metadata;
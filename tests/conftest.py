@@ -0,0 +1,13 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# must be set before config.settings is imported: no landing files, metrics
+# exports or rate limiting while the suite runs
+os.environ.setdefault("LANDING_ENABLED", "false")
+os.environ.setdefault("METRICS_JSON_PATH", "")
+os.environ.setdefault("METRICS_PROM_PATH", "")
+os.environ.setdefault("TRAVELOKA_HTTP_RATE_LIMIT", "0")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
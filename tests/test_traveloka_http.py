@@ -0,0 +1,181 @@
+import json
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from benchmarks import fixtures
+from utils.checkpoint import CrawlCheckpoint
+from channels.traveloka_http import crawl_traveloka_reviews_http, extract_embedded_state, extract_hotel_name
+from channels.traveloka_payload import find_review_records, generate_external_id, parse_review_record, review_key
+
+HOTEL_PATH = "/en-id/hotel/indonesia/hotel-benchmark-1000012345"
+EMBEDDED_REVIEWS = 10
+API_REVIEWS = 40
+
+
+# ---------------------------------------------------------------------
+# PARSERS
+# ---------------------------------------------------------------------
+def test_extract_embedded_state_reads_next_data_and_window_state():
+    page_html = next(fixtures.traveloka_html_pages(3))
+    page_html += '<script>window.__INITIAL_STATE__ = {"reviews": []};</script>'
+
+    states = extract_embedded_state(page_html)
+
+    assert len(states) == 2
+    assert states[0]["props"]["pageProps"]["hotel"]["id"] == "1000012345"
+    assert states[1] == {"reviews": []}
+
+
+def test_extract_embedded_state_skips_invalid_json():
+    page_html = '<script id="__NEXT_DATA__" type="application/json">{not json}</script>'
+    assert extract_embedded_state(page_html) == []
+
+
+@pytest.mark.parametrize("page_html, expected", [
+    ("<h1 class='title'><span>Hotel &amp; Spa</span> Bandung</h1>", "Hotel & Spa Bandung"),
+    ('<meta property="og:title" content="Hotel Benchmark">', "Hotel Benchmark"),
+    ("<html><body>no title</body></html>", "Unknown"),
+])
+def test_extract_hotel_name(page_html, expected):
+    assert extract_hotel_name(page_html) == expected
+
+
+def test_find_review_records_walks_nested_payload():
+    payload = {
+        "data": {
+            "hotel": {"name": "Hotel Benchmark", "rating": 8.9},
+            "reviewList": [
+                fixtures.traveloka_record(1),
+                {"reviewer": {"name": "Siti"}, "text": "Kamar bersih", "score": 9},
+                {"reviewText": "no author or rating"},
+            ],
+        }
+    }
+
+    records = list(find_review_records(payload))
+
+    assert [r.get("reviewId") for r in records] == ["900000001", None]
+    assert records[1]["reviewer"]["name"] == "Siti"
+
+
+def test_parse_review_record_maps_fields():
+    record = fixtures.traveloka_record(7)
+
+    review = parse_review_record(record, capture="http")
+
+    assert review["author_name"] == fixtures.author(7)
+    assert review["content"] == fixtures.review_text(7)
+    assert review["rating"] == record["overallScore"]
+    assert review["review_created_at"] == datetime.fromtimestamp(record["reviewTime"] / 1000)
+    assert review["metadata"]["capture"] == "http"
+    assert review["metadata"]["review_id"] == record["reviewId"]
+
+
+@pytest.mark.parametrize("rating, expected", [("9,2", 9.2), (92, 9.2), ({"value": 8}, 8.0), ("n/a", None)])
+def test_parse_review_record_rating_formats(rating, expected):
+    record = {"reviewerName": "Budi", "reviewText": "Lumayan", "rating": rating}
+    assert parse_review_record(record)["rating"] == expected
+
+
+def test_generate_external_id_is_per_hotel():
+    hotel_a = "https://www.traveloka.com/en-id/hotel/indonesia/hotel-a-1000012345"
+    hotel_b = "https://www.traveloka.com/en-id/hotel/indonesia/hotel-b-1000067890"
+
+    assert generate_external_id(hotel_a, "Budi", "Bagus") != generate_external_id(hotel_b, "Budi", "Bagus")
+    assert generate_external_id(hotel_a, "Budi", "Bagus") == generate_external_id(hotel_a + "?spec=1", " Budi", "Bagus ")
+
+
+def test_parse_review_record_requires_author_and_content():
+    assert parse_review_record({"reviewerName": "Budi", "reviewText": "  ", "rating": 9}) is None
+    assert parse_review_record({"reviewText": "Bagus", "rating": 9}) is None
+
+
+# ---------------------------------------------------------------------
+# CRAWL (local HTTP server)
+# ---------------------------------------------------------------------
+class TravelokaHandler(BaseHTTPRequestHandler):
+    """Hotel page with embedded reviews 0..9, review endpoint serving 10..49"""
+    def log_message(self, *args):
+        pass
+
+    def _send(self, body, content_type):
+        data = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path != HOTEL_PATH:
+            self.send_error(404)
+            return
+        self._send(next(fixtures.traveloka_html_pages(EMBEDDED_REVIEWS, per_page=EMBEDDED_REVIEWS)), "text/html")
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))["data"]
+        self.server.review_requests.append(body)
+        start = EMBEDDED_REVIEWS + body["skip"]
+        end = min(start + body["top"], EMBEDDED_REVIEWS + API_REVIEWS)
+        records = [fixtures.traveloka_record(i) for i in range(start, end)]
+        self._send(json.dumps({"data": {"reviewList": records}}), "application/json")
+
+
+@pytest.fixture
+def traveloka_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), TravelokaHandler)
+    server.review_requests = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_crawl_traveloka_reviews_http(traveloka_server):
+    base = f"http://127.0.0.1:{traveloka_server.server_port}"
+
+    hotel_name, reviews = crawl_traveloka_reviews_http(base + HOTEL_PATH, max_pages=5, api_url=base + "/review")
+
+    assert hotel_name == "Hotel Benchmark"
+    assert len(reviews) == EMBEDDED_REVIEWS + API_REVIEWS
+    assert len({review_key(r) for r in reviews}) == len(reviews)
+    assert {r["metadata"]["capture"] for r in reviews[:EMBEDDED_REVIEWS]} == {"http-embedded"}
+    assert {r["metadata"]["capture"] for r in reviews[EMBEDDED_REVIEWS:]} == {"http"}
+    # pages 0 and 1 return reviews, page 2 is empty and ends the crawl
+    assert [r["objectId"] for r in traveloka_server.review_requests] == ["1000012345"] * 3
+
+
+def test_crawl_traveloka_reviews_http_page_on_callback(traveloka_server):
+    base = f"http://127.0.0.1:{traveloka_server.server_port}"
+    flushed = []
+
+    crawl_traveloka_reviews_http(
+        base + HOTEL_PATH, max_pages=1, api_url=base + "/review",
+        on_page=lambda url, name, page_reviews: flushed.append(len(page_reviews)),
+    )
+
+    assert flushed == [EMBEDDED_REVIEWS, 20]
+
+
+def test_crawl_traveloka_reviews_http_ignores_expired_checkpoint(traveloka_server, tmp_path):
+    base = f"http://127.0.0.1:{traveloka_server.server_port}"
+    path = str(tmp_path / "checkpoints.json")
+    CrawlCheckpoint(path).save(base + HOTEL_PATH, 1, "Hotel Benchmark", [])
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    data[base + HOTEL_PATH]["updated_at"] = "2000-01-01T00:00:00"
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+
+    checkpoint = CrawlCheckpoint(path, max_age_hours=24)
+    crawl_traveloka_reviews_http(base + HOTEL_PATH, max_pages=1, api_url=base + "/review", checkpoint=checkpoint)
+
+    # expired entry is dropped, so the crawl starts again at page 0
+    assert [r["skip"] for r in traveloka_server.review_requests] == [0]
+    assert checkpoint.load(base + HOTEL_PATH) is None
@@ -0,0 +1,90 @@
+import json
+import os
+import threading
+from datetime import date, datetime, timedelta
+from utils.logger import warn
+from config.settings import CRAWL_CHECKPOINT_PATH, CRAWL_CHECKPOINT_MAX_AGE_HOURS
+
+
+def _restore_review(review):
+    value = review.get("review_created_at")
+    if isinstance(value, str):
+        try:
+            parse = date.fromisoformat if len(value) == 10 else datetime.fromisoformat
+            review["review_created_at"] = parse(value)
+        except ValueError:
+            pass
+    return review
+
+
+class CrawlCheckpoint:
+    """
+    Checkpoint crawl per URL di file JSON lokal:
+    { url: {"last_page": n, "hotel_name": ..., "reviews": [...], "updated_at": ...} }
+    last_page = index halaman terakhir yang sudah selesai (0-based).
+    Ditulis atomik (tmp + os.replace) dan aman dipakai beberapa thread.
+    Entry yang lebih tua dari max_age_hours (dari updated_at) diabaikan dan
+    dihapus: posisi halaman dan review di dalamnya sudah basi.
+    """
+    def __init__(self, path=CRAWL_CHECKPOINT_PATH, max_age_hours=CRAWL_CHECKPOINT_MAX_AGE_HOURS):
+        self.path = path
+        self.max_age = timedelta(hours=max_age_hours) if max_age_hours > 0 else None
+        self._lock = threading.Lock()
+
+    def _read(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except ValueError as e:
+            warn("⚠ Checkpoint file rusak, diabaikan: %s", e)
+            return {}
+
+    def _write(self, data):
+        folder = os.path.dirname(self.path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, default=str)
+        os.replace(tmp_path, self.path)
+
+    def _expired(self, entry):
+        if self.max_age is None:
+            return False
+        try:
+            updated_at = datetime.fromisoformat(entry["updated_at"])
+        except (KeyError, TypeError, ValueError):
+            return True
+        return datetime.now() - updated_at > self.max_age
+
+    def load(self, url):
+        with self._lock:
+            data = self._read()
+            entry = data.get(url)
+            if entry and self._expired(entry):
+                warn("⚠ Checkpoint %s expired (updated_at=%s), starting from page 1", url, entry.get("updated_at"))
+                del data[url]
+                self._write(data)
+                entry = None
+        if entry:
+            entry["reviews"] = [_restore_review(r) for r in entry.get("reviews", [])]
+        return entry
+
+    def save(self, url, last_page, hotel_name, reviews):
+        with self._lock:
+            data = self._read()
+            data[url] = {
+                "last_page": last_page,
+                "hotel_name": hotel_name,
+                "reviews": reviews,
+                "updated_at": datetime.now().isoformat(timespec="seconds"),
+            }
+            self._write(data)
+
+    def clear(self, url):
+        with self._lock:
+            data = self._read()
+            if data.pop(url, None) is not None:
+                self._write(data)
@@ -1,7 +1,14 @@
 import pymysql
 import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
 from config.settings import *
-from datetime import datetime
+from datetime import datetime, date, timedelta, timezone
+from utils.dedup import split_batch, remember_written
+from utils.metrics import timer, incr
+from utils.logger import debug, info, warn, error
 
 def get_conn():
     return pymysql.connect(
@@ -14,6 +21,127 @@ def get_conn():
         autocommit=True
     )
 
+class ConnectionPool:
+    """
+    Pool koneksi pymysql yang bounded dan thread-safe.
+    - max_size: jumlah koneksi maksimum (idle + dipakai)
+    - idle_timeout: koneksi idle lebih lama dari ini (detik) ditutup
+    - health check: ping(reconnect=True) sebelum koneksi dipinjamkan
+    """
+    def __init__(self, max_size=DB_POOL_SIZE, timeout=DB_POOL_TIMEOUT,
+                 idle_timeout=DB_POOL_IDLE_TIMEOUT, factory=get_conn):
+        self.max_size = max(int(max_size), 1)
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.factory = factory
+        self._idle = deque()  # (conn, last_used)
+        self._size = 0
+        self._cond = threading.Condition(threading.Lock())
+
+    def _close_quietly(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _evict_idle(self):
+        # dipanggil dengan lock dipegang; koneksi terlama ada di kiri
+        now = time.monotonic()
+        while self._idle and now - self._idle[0][1] > self.idle_timeout:
+            conn, _ = self._idle.popleft()
+            self._size -= 1
+            self._close_quietly(conn)
+
+    def _healthy(self, conn):
+        try:
+            conn.ping(reconnect=True)
+            return True
+        except Exception as e:
+            warn("⚠ Pool: koneksi tidak sehat, dibuang: %s", e)
+            return False
+
+    def acquire(self):
+        deadline = time.monotonic() + self.timeout
+        while True:
+            with self._cond:
+                self._evict_idle()
+                while not self._idle and self._size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise TimeoutError(f"Connection pool exhausted (max_size={self.max_size})")
+                    self._cond.wait(remaining)
+                    self._evict_idle()
+
+                if self._idle:
+                    conn, _ = self._idle.pop()
+                else:
+                    conn = None
+                    self._size += 1
+
+            if conn is None:
+                try:
+                    return self.factory()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+
+            if self._healthy(conn):
+                return conn
+
+            self._close_quietly(conn)
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+
+    def release(self, conn, discard=False):
+        with self._cond:
+            if discard or not getattr(conn, "open", True):
+                self._size -= 1
+                self._close_quietly(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def close_all(self):
+        with self._cond:
+            while self._idle:
+                conn, _ = self._idle.popleft()
+                self._size -= 1
+                self._close_quietly(conn)
+            self._cond.notify_all()
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ConnectionPool()
+        return _pool
+
+@contextmanager
+def pooled_conn():
+    """
+    Pinjam koneksi dari pool bersama, otomatis dikembalikan setelah selesai.
+    Kalau terjadi error di dalam block, transaksi yang menggantung di-rollback.
+    """
+    pool = get_pool()
+    conn = pool.acquire()
+    discard = False
+    try:
+        yield conn
+    except Exception:
+        try:
+            conn.rollback()
+        except Exception:
+            discard = True
+        raise
+    finally:
+        pool.release(conn, discard=discard)
+
 def get_or_create_channel(conn, name, type_=None, base_url=GOOGLE_BASE_URL):
     try:
         with conn.cursor() as cur:
@@ -31,12 +159,12 @@ def get_or_create_channel(conn, name, type_=None, base_url=GOOGLE_BASE_URL):
             row = cur.fetchone()
             return row["id"] if row else None
     except Exception as e:
-        print("❌ ERROR get_or_create_channel:", e)
+        error("❌ ERROR get_or_create_channel: %s", e)
         return None
 
 def update_channel_last_ingested(conn, channel_id):
     if not channel_id:
-        print("❌ channel_id kosong")
+        error("❌ channel_id kosong")
         return False
     try:
         with conn.cursor() as cur:
@@ -47,120 +175,329 @@ def update_channel_last_ingested(conn, channel_id):
             """, (channel_id,))
         return True
     except Exception as e:
-        print("❌ ERROR update_channel_last_ingested:", e)
+        error("❌ ERROR update_channel_last_ingested: %s", e)
         return False
 
-def insert_raw_feedback(conn, items):
+def fetch_review_key_rows(conn, channel_id, prefix_len=100):
     """
-    Insert atau update review ke raw_feedback.
-    Logic:
-    - Jika item punya external_id: cek berdasarkan (channel_id, external_id)
-        -> jika ada: update fields (content, metadata, review_created_at, source_url, author_name, rating)
-        -> jika tidak ada: insert baru
-    - Jika item tidak punya external_id: fallback ke cek author+rating+content (legacy)
+    Ambil author_name + prefix content semua review di channel,
+    dipakai crawler untuk mengenali review yang sudah tersimpan.
     """
-    if not items:
-        print("⚠ insert_raw_feedback: empty items")
-        return 0
+    if not channel_id:
+        return []
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                "SELECT author_name, LEFT(content, %s) AS content FROM raw_feedback WHERE channel_id = %s",
+                (prefix_len, channel_id),
+            )
+            return cur.fetchall()
+    except Exception as e:
+        error("❌ ERROR fetch_review_key_rows: %s", e)
+        return []
+
+def backfill_external_ids(conn, channel_id, make_id, batch_size=DB_BATCH_SIZE, rekey=False):
+    """
+    One-off: isi external_id untuk row lama (external_id NULL) di satu channel.
+    make_id(row) menerima dict (id, external_id, author_name, content, source_url,
+    review_created_at) dan mengembalikan external_id atau None.
+    rekey=True: hitung ulang external_id untuk semua row channel (format ID berubah).
+    Row yang ID-nya bentrok dengan row lain (duplikat legacy) dibiarkan apa adanya.
+    Return dict: updated, duplicate, skipped.
+    """
+    stats = {"updated": 0, "duplicate": 0, "skipped": 0}
+    with conn.cursor() as cur:
+        taken = set()
+        if not rekey:
+            cur.execute(
+                "SELECT external_id FROM raw_feedback WHERE channel_id = %s AND external_id IS NOT NULL",
+                (channel_id,),
+            )
+            taken = {row["external_id"] for row in cur.fetchall()}
+        missing_only = "" if rekey else "AND external_id IS NULL"
+        cur.execute(f"""
+            SELECT id, external_id, author_name, content, source_url, review_created_at
+            FROM raw_feedback
+            WHERE channel_id = %s {missing_only}
+            ORDER BY id
+        """, (channel_id,))
+        rows = cur.fetchall()
+
+    updates = []
+    for row in rows:
+        external_id = make_id(row)
+        if not external_id or external_id == row["external_id"]:
+            stats["skipped"] += 1
+        elif external_id in taken:
+            stats["duplicate"] += 1
+        else:
+            taken.add(external_id)
+            updates.append((external_id, row["id"]))
+
+    for start, chunk in _chunked(updates, batch_size):
+        try:
+            conn.begin()
+            with conn.cursor() as cur:
+                cur.executemany("UPDATE raw_feedback SET external_id = %s WHERE id = %s", chunk)
+            conn.commit()
+            stats["updated"] += len(chunk)
+        except Exception as e:
+            conn.rollback()
+            error("❌ ERROR backfill_external_ids chunk %d-%d: %s", start, start + len(chunk) - 1, e)
+
+    info("🔁 Backfill channel %s: updated=%d, duplicate=%d, skipped=%d",
+         channel_id, stats["updated"], stats["duplicate"], stats["skipped"])
+    return stats
+
+def get_channel_watermark(conn, channel_id):
+    """
+    Ambil channels.last_ingested_at sebagai watermark incremental, dalam UTC (aware).
+    last_ingested_at ditulis dengan NOW() (jam session DB), jadi dikonversi di DB
+    memakai selisih NOW() - UTC_TIMESTAMP(), bukan timezone host aplikasi.
+    Return None kalau channel belum punya data di raw_feedback
+    (last_ingested_at diisi NOW() saat channel dibuat, jadi belum bisa dipercaya).
+    """
+    if not channel_id:
+        return None
+    try:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT c.last_ingested_at
+                           - INTERVAL TIMESTAMPDIFF(SECOND, UTC_TIMESTAMP(), NOW()) SECOND AS last_ingested_at_utc,
+                       EXISTS(SELECT 1 FROM raw_feedback r WHERE r.channel_id = c.id) AS has_data
+                FROM channels c
+                WHERE c.id = %s
+            """, (channel_id,))
+            row = cur.fetchone()
+        if not row or not row["has_data"] or not row["last_ingested_at_utc"]:
+            return None
+        return row["last_ingested_at_utc"].replace(tzinfo=timezone.utc)
+    except Exception as e:
+        error("❌ ERROR get_channel_watermark: %s", e)
+        return None
+
+def get_incremental_cutoff(conn, channel_id, overlap_minutes=INCREMENTAL_OVERLAP_MINUTES):
+    """
+    Watermark dikurangi safety overlap. None = full ingestion.
+    Nilai aware UTC (lihat get_channel_watermark).
+    """
+    watermark = get_channel_watermark(conn, channel_id)
+    if not watermark:
+        return None
+    return watermark - timedelta(minutes=overlap_minutes)
+
+def _as_aware(value):
+    # naive = jam lokal host aplikasi (datetime.fromtimestamp, parser crawler)
+    return value if value.tzinfo is not None else value.astimezone()
+
+def is_older_than(value, cutoff):
+    """
+    Bandingkan review_created_at (datetime aware/naive atau date) dengan cutoff.
+    Keduanya dibandingkan sebagai datetime aware; date dibandingkan dengan
+    tanggal cutoff di jam lokal. Nilai kosong tidak pernah dianggap lama.
+    """
+    if not value or not cutoff:
+        return False
+    cutoff = _as_aware(cutoff)
+    if isinstance(value, datetime):
+        return _as_aware(value) < cutoff
+    if isinstance(value, date):
+        return value < cutoff.astimezone().date()
+    return False
 
-    success = 0
-    updated = 0
-    duplicate_count = 0
+def _chunked(items, size):
+    size = max(int(size or 1), 1)
+    for start in range(0, len(items), size):
+        yield start, items[start:start + size]
 
-    insert_sql = """
-        INSERT INTO raw_feedback
-        (channel_id, external_id, author_name, rating, content, source_url, review_created_at, metadata)
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+def _feedback_row(item, external_id, fingerprint=None):
+    return (
+        item.get("channel_id"),
+        external_id,
+        item.get("author_name"),
+        item.get("rating"),
+        item.get("content"),
+        item.get("source_url"),
+        item.get("review_created_at"),
+        json.dumps(item.get("metadata", {}), default=str),
+        fingerprint,
+    )
+
+# butuh kolom fingerprint CHAR(32) NULL di raw_feedback (migrations/002_raw_feedback_fingerprint.sql)
+insert_raw_feedback_sql = """
+    INSERT INTO raw_feedback
+    (channel_id, external_id, author_name, rating, content, source_url, review_created_at, metadata, fingerprint)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+# butuh UNIQUE KEY (channel_id, external_id) di raw_feedback (migrations/001_raw_feedback_external_id_unique.sql)
+upsert_raw_feedback_sql = insert_raw_feedback_sql + """
+    ON DUPLICATE KEY UPDATE
+        author_name=VALUES(author_name),
+        rating=VALUES(rating),
+        content=VALUES(content),
+        source_url=VALUES(source_url),
+        review_created_at=VALUES(review_created_at),
+        metadata=VALUES(metadata),
+        fingerprint=VALUES(fingerprint),
+        review_updated_at=NOW()
+"""
+
+def _write_chunk(conn, sql, entries, rows):
+    """1 transaksi per chunk: executemany lalu commit; (item, fingerprint) yang ter-commit masuk index preload"""
+    conn.begin()
+    with conn.cursor() as cur:
+        cur.executemany(sql, rows)
+    conn.commit()
+    incr("db_round_trips", 3)  # BEGIN, multi-row INSERT, COMMIT
+    remember_written(entries)
+
+def _write_chunk_or_rows(conn, sql, entries, rows, label, start):
     """
-    check_by_external_sql = """
-        SELECT id FROM raw_feedback
-        WHERE channel_id = %s AND external_id = %s
-        LIMIT 1
+    _write_chunk; kalau chunk gagal, diulang per row supaya hanya row yang
+    bermasalah yang hilang (bukan seluruh chunk). Return index row yang ter-commit.
     """
-    update_sql = """
-        UPDATE raw_feedback
-        SET author_name=%s, rating=%s, content=%s, source_url=%s, review_created_at=%s, metadata=%s, review_updated_at=NOW()
-        WHERE id=%s
+    try:
+        _write_chunk(conn, sql, entries, rows)
+        return list(range(len(rows)))
+    except Exception as e:
+        conn.rollback()
+        warn("⚠ insert_raw_feedback %s chunk %d-%d failed, retrying per row: %s",
+             label, start, start + len(rows) - 1, e)
+
+    written = []
+    for i, (entry, row) in enumerate(zip(entries, rows)):
+        try:
+            _write_chunk(conn, sql, [entry], [row])
+        except Exception as e:
+            conn.rollback()
+            error("❌ ERROR insert_raw_feedback %s idx %d: %s", label, start + i, e)
+            continue
+        written.append(i)
+    return written
+
+def upsert_raw_feedback(conn, items, batch_size=DB_BATCH_SIZE, min_created_at=None):
     """
-    # legacy check
-    check_legacy_sql = """
-        SELECT id FROM raw_feedback 
-        WHERE author_name=%s AND rating=%s AND content=%s
-        LIMIT 1
+    Batched write path untuk raw_feedback.
+    Sebelum write, batch melewati dedup stage (utils.dedup.split_batch) sehingga
+    baru vs sudah ada diketahui di memory; chunk hanya berisi executemany.
+    Row yang sudah ada dengan fingerprint sama tidak di-UPDATE sama sekali (unchanged).
+    Item dipecah per chunk (batch_size), tiap chunk = 1 transaksi.
+    min_created_at (incremental cutoff): item dengan review_created_at lebih lama di-skip.
+    Return dict: inserted, updated, unchanged, duplicate, skipped, stale, failed.
     """
+    with timer("db_upsert"):
+        stats = _upsert_raw_feedback(conn, items, batch_size, min_created_at)
+    for key in ("inserted", "updated", "unchanged", "duplicate", "failed"):
+        if stats[key]:
+            incr(f"items_{key}", stats[key])
+    return stats
+
+def _upsert_raw_feedback(conn, items, batch_size, min_created_at):
+    stats = {
+        "inserted": 0, "updated": 0, "unchanged": 0, "duplicate": 0,
+        "skipped": 0, "stale": 0, "failed": 0,
+    }
 
+    candidates = []
     for idx, item in enumerate(items):
         content = item.get("content")
         if not content or not content.strip():
-            print(f"⚠ Skip idx {idx}: content kosong")
+            debug("⚠ Skip idx %d: content kosong", idx)
+            stats["skipped"] += 1
             continue
+        if is_older_than(item.get("review_created_at"), min_created_at):
+            stats["stale"] += 1
+            continue
+        candidates.append(item)
 
-        channel_id = item.get("channel_id")
-        external_id = item.get("external_id")
-        try:
-            with conn.cursor() as cur:
-                if external_id:
-                    # check by external id
-                    cur.execute(check_by_external_sql, (channel_id, external_id))
-                    existing = cur.fetchone()
-                    if existing:
-                        # update existing record
-                        cur.execute(update_sql, (
-                            item.get("author_name"),
-                            item.get("rating"),
-                            content,
-                            item.get("source_url"),
-                            item.get("review_created_at"),
-                            json.dumps(item.get("metadata", {})),
-                            existing["id"]
-                        ))
-                        updated += 1
-                    else:
-                        # insert new
-                        cur.execute(insert_sql, (
-                            channel_id,
-                            external_id,
-                            item.get("author_name"),
-                            item.get("rating"),
-                            content,
-                            item.get("source_url"),
-                            item.get("review_created_at"),
-                            json.dumps(item.get("metadata", {}))
-                        ))
-                        success += 1
-                else:
-                    # legacy path: check by author+rating+content
-                    cur.execute(check_legacy_sql, (item.get("author_name"), item.get("rating"), content))
-                    exist = cur.fetchone()
-                    if exist:
-                        duplicate_count += 1
-                        continue
-                    cur.execute(insert_sql, (
-                        channel_id,
-                        None,
-                        item.get("author_name"),
-                        item.get("rating"),
-                        content,
-                        item.get("source_url"),
-                        item.get("review_created_at"),
-                        json.dumps(item.get("metadata", {}))
-                    ))
-                    success += 1
+    if not candidates:
+        return stats
 
-        except Exception as e:
-            print(f"❌ ERROR insert_raw_feedback idx={idx}: {e}")
-            continue
+    try:
+        split = split_batch(conn, candidates)
+    except Exception as e:
+        # tanpa hasil dedup tidak ada yang bisa ditulis dengan aman; batch dihitung failed
+        stats["failed"] += len(candidates)
+        error("❌ ERROR dedup lookup insert_raw_feedback (%d items): %s", len(candidates), e)
+        return stats
+    stats["duplicate"] = split["legacy_duplicate"]
+
+    to_write = []
+    for item, fingerprint, status in split["external"]:
+        if status == "unchanged":
+            stats["unchanged"] += 1
+        else:
+            to_write.append((item, fingerprint, status))
+
+    for start, chunk in _chunked(to_write, batch_size):
+        written = _write_chunk_or_rows(
+            conn, upsert_raw_feedback_sql, [(item, fp) for item, fp, _ in chunk],
+            [_feedback_row(item, str(item["external_id"]), fp) for item, fp, _ in chunk],
+            "external_id", start,
+        )
+        new_count = sum(1 for i in written if chunk[i][2] == "new")
+        stats["inserted"] += new_count
+        stats["updated"] += len(written) - new_count
+        stats["failed"] += len(chunk) - len(written)
+
+    for start, chunk in _chunked(split["legacy_new"], batch_size):
+        written = _write_chunk_or_rows(
+            conn, insert_raw_feedback_sql, chunk, [_feedback_row(item, None, fp) for item, fp in chunk],
+            "legacy", start,
+        )
+        stats["inserted"] += len(written)
+        stats["failed"] += len(chunk) - len(written)
+
+    return stats
+
+def insert_raw_feedback(conn, items, batch_size=DB_BATCH_SIZE, min_created_at=None):
+    """
+    Insert atau update review ke raw_feedback.
+    Logic:
+    - Jika item punya external_id: upsert berdasarkan (channel_id, external_id)
+        -> jika ada: update fields (content, metadata, review_created_at, source_url, author_name, rating)
+           hanya kalau fingerprint berbeda; kalau sama dihitung unchanged
+        -> jika tidak ada: insert baru
+    - Jika item tidak punya external_id: fallback ke cek author+rating+content per channel (legacy)
+    Cek baru/sudah ada dilakukan di memory (DEDUP_MODE: lookup per batch atau preload per channel).
+    Ditulis per chunk (batch_size, default DB_BATCH_SIZE) lewat executemany, 1 transaksi per chunk.
+    Jika min_created_at diisi (incremental), item yang lebih lama dari cutoff tidak ditulis.
+    """
+    if not items:
+        warn("⚠ insert_raw_feedback: empty items")
+        return 0
+
+    stats = upsert_raw_feedback(conn, items, batch_size=batch_size, min_created_at=min_created_at)
+    return print_feedback_summary(stats)
+
+def merge_feedback_stats(total, stats):
+    """Jumlahkan stats upsert_raw_feedback (dipakai write path streaming per chunk)"""
+    for key, value in stats.items():
+        total[key] = total.get(key, 0) + value
+    return total
+
+def print_feedback_summary(stats):
+    """Cetak ringkasan stats upsert_raw_feedback, return jumlah row yang ditulis (inserted + updated)"""
+    success = stats["inserted"]
+    updated = stats["updated"]
+    duplicate_count = stats["duplicate"]
 
     # Summary output
     total_written = success + updated
     if total_written == 0:
-        if duplicate_count > 0:
-            print(f"\n📊 Tidak ada pembaruan data. Semua data sudah ada di database. (duplicate_count={duplicate_count})")
+        if duplicate_count > 0 or stats["unchanged"] > 0:
+            info("📊 Tidak ada pembaruan data. Semua data sudah ada di database. "
+                 "(duplicate_count=%d, unchanged=%d)", duplicate_count, stats["unchanged"])
         else:
-            print(f"\n📊 Tidak ada data yang berhasil diproses.")
+            info("📊 Tidak ada data yang berhasil diproses.")
     else:
-        print(f"\n✅ Data terbaru berhasil ditambahkan/diupdate. Inserted: {success}, Updated: {updated}")
+        info("✅ Data terbaru berhasil ditambahkan/diupdate. Inserted: %d, Updated: %d", success, updated)
         if duplicate_count > 0:
-            print(f"📋 Skip (legacy duplicates): {duplicate_count}")
+            info("📋 Skip (legacy duplicates): %d", duplicate_count)
+    if stats["unchanged"] > 0:
+        info("🟰 Skip (unchanged, fingerprint sama): %d", stats["unchanged"])
+    if stats["stale"] > 0:
+        info("⏭ Skip (older than incremental cutoff): %d", stats["stale"])
 
-    return total_written
\ No newline at end of file
+    return total_written
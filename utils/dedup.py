@@ -0,0 +1,252 @@
+import hashlib
+import json
+import math
+import threading
+import pymysql
+from utils.metrics import incr
+from utils.logger import info
+from config.settings import DEDUP_MODE, DEDUP_BLOOM_THRESHOLD, DEDUP_LOOKUP_CHUNK
+
+
+class BloomFilter:
+    """
+    Bloom filter sederhana (bytearray + double hashing md5).
+    Tidak ada false negative: key yang "tidak ada" pasti baru.
+    Key yang "ada" bisa false positive, jadi harus dikonfirmasi ke DB.
+    """
+    def __init__(self, capacity, error_rate=0.01):
+        capacity = max(int(capacity), 1)
+        self.size = max(int(-capacity * math.log(error_rate) / (math.log(2) ** 2)), 8)
+        self.hash_count = max(int(round(self.size / capacity * math.log(2))), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key):
+        digest = hashlib.md5(key.encode("utf-8")).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, key):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+def legacy_hash(author_name, rating, content):
+    """Hash author+rating+content (key legacy untuk item tanpa external_id)"""
+    # rating dari DB bisa Decimal, dari crawler float/int -> samakan dulu
+    rating = "" if rating is None else repr(float(rating))
+    raw = f"{author_name}|{rating}|{content}"
+    return hashlib.md5(raw.encode("utf-8")).hexdigest()
+
+
+# metadata yang berubah sendiri antar run (teks waktu relatif, mode capture),
+# tidak ikut fingerprint supaya tidak memicu update palsu
+FINGERPRINT_IGNORED_METADATA = ("relative_time", "raw_date_text", "capture")
+
+
+def row_fingerprint(item):
+    """
+    Hash semua kolom yang ditulis upsert (author, rating, content, source_url,
+    review_created_at, metadata), dinormalisasi; sama = tidak perlu update.
+    """
+    rating = item.get("rating")
+    created_at = item.get("review_created_at")
+    metadata = {
+        k: v for k, v in (item.get("metadata") or {}).items()
+        if k not in FINGERPRINT_IGNORED_METADATA
+    }
+    raw = json.dumps(
+        [
+            (item.get("author_name") or "").strip(),
+            None if rating is None else repr(float(rating)),
+            (item.get("content") or "").strip(),
+            item.get("source_url"),
+            None if created_at is None else str(created_at),
+            metadata,
+        ],
+        sort_keys=True, ensure_ascii=False, default=str,
+    )
+    return hashlib.md5(raw.encode("utf-8")).hexdigest()
+
+
+class ChannelKeyIndex:
+    """
+    Key yang sudah ada di raw_feedback untuk satu channel:
+    external_id (-> fingerprint) dan legacy_hash. Disimpan di dict/set, atau
+    Bloom filter untuk channel yang sangat besar (exact=False -> positif perlu
+    dikonfirmasi, fingerprint tidak tersedia).
+    """
+    def __init__(self, channel_id, capacity=0, use_bloom=False):
+        self.channel_id = channel_id
+        self.exact = not use_bloom
+        if use_bloom:
+            self.external = BloomFilter(capacity)
+            self.legacy = BloomFilter(capacity)
+        else:
+            self.external = {}
+            self.legacy = set()
+
+    def add_external(self, key, fingerprint=None):
+        if self.exact:
+            self.external[str(key)] = fingerprint
+        else:
+            self.external.add(str(key))
+
+    def add_legacy(self, key):
+        self.legacy.add(key)
+
+
+def _select_in(cur, sql, channel_id, values):
+    """Jalankan sql (berisi {placeholders}) untuk values, dipecah per DEDUP_LOOKUP_CHUNK"""
+    values = list(values)
+    rows = []
+    for start in range(0, len(values), DEDUP_LOOKUP_CHUNK):
+        part = values[start:start + DEDUP_LOOKUP_CHUNK]
+        placeholders = ", ".join(["%s"] * len(part))
+        cur.execute(sql.format(placeholders=placeholders), (channel_id, *part))
+        incr("db_round_trips")
+        rows.extend(cur.fetchall())
+    return rows
+
+
+def lookup_batch_keys(cur, channel_id, external_ids, legacy_authors):
+    """Index exact untuk key batch saja: IN (...) atas external_id dan author legacy"""
+    index = ChannelKeyIndex(channel_id)
+    if external_ids:
+        rows = _select_in(
+            cur,
+            "SELECT external_id, fingerprint FROM raw_feedback "
+            "WHERE channel_id = %s AND external_id IN ({placeholders})",
+            channel_id, external_ids,
+        )
+        for row in rows:
+            index.add_external(row["external_id"], row["fingerprint"])
+    if legacy_authors:
+        rows = _select_in(
+            cur,
+            "SELECT author_name, rating, content FROM raw_feedback "
+            "WHERE channel_id = %s AND external_id IS NULL AND author_name IN ({placeholders})",
+            channel_id, legacy_authors,
+        )
+        for row in rows:
+            index.add_legacy(legacy_hash(row["author_name"], row["rating"], row["content"]))
+    return index
+
+
+def preload_channel_keys(conn, channel_id, bloom_threshold=DEDUP_BLOOM_THRESHOLD):
+    """Index semua key channel; Bloom filter jika jumlah row > bloom_threshold"""
+    with conn.cursor() as cur:
+        cur.execute("SELECT COUNT(*) AS total FROM raw_feedback WHERE channel_id = %s", (channel_id,))
+        total = cur.fetchone()["total"]
+        incr("db_round_trips")
+    use_bloom = total > bloom_threshold
+    index = ChannelKeyIndex(channel_id, capacity=total * 2, use_bloom=use_bloom)
+
+    # unbuffered cursor: row di-stream, tidak ditampung semua di memory
+    with conn.cursor(pymysql.cursors.SSDictCursor) as cur:
+        cur.execute(
+            "SELECT external_id, fingerprint, author_name, rating, content FROM raw_feedback WHERE channel_id = %s",
+            (channel_id,),
+        )
+        incr("db_round_trips")
+        for row in cur:
+            if row["external_id"]:
+                index.add_external(row["external_id"], row["fingerprint"])
+            else:
+                index.add_legacy(legacy_hash(row["author_name"], row["rating"], row["content"]))
+
+    info("🧮 Preloaded %d keys for channel %s (%s)", total, channel_id, "bloom" if use_bloom else "set")
+    return index
+
+
+_MISSING = object()
+_preloaded = {}
+_preloaded_lock = threading.Lock()
+
+def get_preloaded_index(conn, channel_id):
+    """Index preload di-cache per proses, supaya batch berikutnya tidak query ulang"""
+    with _preloaded_lock:
+        index = _preloaded.get(channel_id)
+        if index is None:
+            index = _preloaded[channel_id] = preload_channel_keys(conn, channel_id)
+        return index
+
+
+def remember_written(entries):
+    """Tambahkan (item, fingerprint) yang sudah ter-commit ke index preload (kalau ada)"""
+    with _preloaded_lock:
+        for item, fingerprint in entries:
+            index = _preloaded.get(item.get("channel_id"))
+            if index is None:
+                continue
+            if item.get("external_id"):
+                index.add_external(item["external_id"], fingerprint)
+            else:
+                index.add_legacy(legacy_hash(item.get("author_name"), item.get("rating"), item.get("content")))
+
+
+def split_batch(conn, items, mode=DEDUP_MODE):
+    """
+    Dedup stage sebelum write. Item dikelompokkan per channel, key-nya dicek
+    ke index (lookup: IN (...) atas batch; preload: semua key channel).
+    Return dict:
+      external: list (item, fingerprint, status) -> item dengan external_id,
+                status "new" | "changed" | "unchanged" (fingerprint sama)
+      legacy_new: list (item, fingerprint)       -> legacy yang belum ada
+      legacy_duplicate: int                      -> legacy yang sudah ada
+    Index preload tidak diubah di sini; panggil remember_written setelah commit.
+    """
+    by_channel = {}
+    for item in items:
+        by_channel.setdefault(item.get("channel_id"), []).append(item)
+
+    result = {"external": [], "legacy_new": [], "legacy_duplicate": 0}
+    for channel_id, channel_items in by_channel.items():
+        external_ids = {str(i["external_id"]) for i in channel_items if i.get("external_id")}
+        legacy_authors = {i.get("author_name") for i in channel_items if not i.get("external_id")}
+
+        if mode == "preload":
+            index = get_preloaded_index(conn, channel_id)
+            if not index.exact:
+                # Bloom: hanya key yang "mungkin ada" dikonfirmasi ke DB
+                maybe_external = {k for k in external_ids if k in index.external}
+                maybe_authors = {
+                    i.get("author_name") for i in channel_items
+                    if not i.get("external_id")
+                    and legacy_hash(i.get("author_name"), i.get("rating"), i.get("content")) in index.legacy
+                }
+                with conn.cursor() as cur:
+                    confirmed = lookup_batch_keys(cur, channel_id, maybe_external, maybe_authors)
+            else:
+                confirmed = index
+        else:
+            with conn.cursor() as cur:
+                confirmed = lookup_batch_keys(cur, channel_id, external_ids, legacy_authors)
+
+        seen_external = {}
+        seen_legacy = set()
+        for item in channel_items:
+            if item.get("external_id"):
+                key = str(item["external_id"])
+                fingerprint = row_fingerprint(item)
+                # external_id kembar di batch yang sama -> dibandingkan dengan kemunculan sebelumnya
+                stored = seen_external.get(key, confirmed.external.get(key, _MISSING))
+                if stored is _MISSING:
+                    status = "new"
+                else:
+                    # fingerprint NULL (row lama) selalu dianggap changed -> terisi sekali
+                    status = "unchanged" if stored == fingerprint else "changed"
+                seen_external[key] = fingerprint
+                result["external"].append((item, fingerprint, status))
+            else:
+                key = legacy_hash(item.get("author_name"), item.get("rating"), item.get("content"))
+                if key in confirmed.legacy or key in seen_legacy:
+                    result["legacy_duplicate"] += 1
+                    continue
+                seen_legacy.add(key)
+                result["legacy_new"].append((item, row_fingerprint(item)))
+
+    return result
@@ -0,0 +1,280 @@
+import json
+import random
+import threading
+import time
+import requests
+from utils.logger import warn
+from utils.metrics import incr
+from config.settings import (
+    HTTP_TIMEOUT,
+    HTTP_MAX_RETRIES,
+    HTTP_RETRY_BUDGET,
+    HTTP_BACKOFF_BASE,
+    HTTP_BACKOFF_MAX,
+    FB_RATE_LIMIT,
+    GOOGLE_RATE_LIMIT,
+    TRAVELOKA_HTTP_RATE_LIMIT,
+)
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Graph API throttling: dikirim sebagai HTTP 400/403 + error.code, bukan 429
+FB_THROTTLE_CODES = {4, 17, 32, 613} | set(range(80000, 80015))
+
+# usage (%) di bawah ini tidak menurunkan rate; di atasnya rate turun linear
+USAGE_SOFT_LIMIT = 50.0
+MIN_RATE_FACTOR = 0.05
+
+
+class TokenBucket:
+    """
+    Token bucket thread-safe: rate token/detik, maksimal burst token.
+    acquire() menunggu sampai ada token. rate <= 0 berarti tanpa limit.
+    """
+    def __init__(self, rate, burst=None):
+        self._lock = threading.Lock()
+        self.rate = float(rate)
+        self.capacity = float(burst or max(self.rate, 1.0))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+
+    def _refill(self, now):
+        if self.rate > 0:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def set_rate(self, rate):
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = float(rate)
+
+    def pause(self, seconds):
+        """Tahan semua request selama seconds (mis. estimated_time_to_regain_access)"""
+        with self._lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def acquire(self):
+        """Ambil 1 token; return lama menunggu (detik)"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    wait = self.paused_until - now
+                elif self.rate <= 0:
+                    return waited
+                else:
+                    self._refill(now)
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return waited
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+
+def facebook_usage(response):
+    """
+    Usage tertinggi (%) dari X-App-Usage / X-Business-Use-Case-Usage, dan
+    detik sampai akses pulih (estimated_time_to_regain_access, dalam menit).
+    Return (usage, regain_seconds); usage None kalau header tidak ada.
+    """
+    usage, regain = None, 0.0
+    entries = []
+    for header in ("X-App-Usage", "X-Business-Use-Case-Usage"):
+        raw = response.headers.get(header)
+        if not raw:
+            continue
+        try:
+            parsed = json.loads(raw)
+        except ValueError:
+            continue
+        if header == "X-App-Usage":
+            entries.append(parsed)
+        else:
+            # {"<business_id>": [{"type": ..., "call_count": ..., ...}]}
+            for values in parsed.values():
+                entries.extend(values if isinstance(values, list) else [values])
+
+    for entry in entries:
+        if not isinstance(entry, dict):
+            continue
+        for key in ("call_count", "total_cputime", "total_time"):
+            value = entry.get(key)
+            if isinstance(value, (int, float)):
+                usage = max(usage or 0.0, float(value))
+        minutes = entry.get("estimated_time_to_regain_access")
+        if isinstance(minutes, (int, float)) and minutes > 0:
+            regain = max(regain, minutes * 60.0)
+    return usage, regain
+
+
+def facebook_throttled(response):
+    """Graph API error rate limit (app/user/page/BUC) meski status bukan 429"""
+    if response.status_code not in (400, 403):
+        return False
+    try:
+        code = (response.json().get("error") or {}).get("code")
+    except (ValueError, AttributeError):
+        return False
+    return code in FB_THROTTLE_CODES
+
+
+def google_throttled(response):
+    """Places API melaporkan kuota habis sebagai HTTP 200 + status OVER_QUERY_LIMIT"""
+    if response.status_code != 200:
+        return False
+    try:
+        return response.json().get("status") == "OVER_QUERY_LIMIT"
+    except (ValueError, AttributeError):
+        return False
+
+
+class HttpClient:
+    """
+    HTTP client per channel: token bucket, retry dengan jittered exponential
+    backoff untuk 429/5xx/timeout, dan retry budget supaya API yang sedang
+    bermasalah tidak membuat run menggantung.
+
+    Rate efektif = rate * min(usage_factor, throttle_factor):
+      usage_factor    -> dari header usage (Facebook), turun linear di atas 50%
+      throttle_factor -> dibagi 2 setiap kena throttle, naik lagi +0.1 per sukses
+    Response terakhir (termasuk error) dikembalikan; caller tetap memanggil
+    raise_for_status(). Exception koneksi dilempar setelah retry habis.
+    """
+    def __init__(self, channel, rate, burst=None, max_retries=HTTP_MAX_RETRIES, retry_budget=HTTP_RETRY_BUDGET,
+                 timeout=HTTP_TIMEOUT, usage_parser=None, throttle_check=None, session=None):
+        self.channel = channel
+        self.base_rate = float(rate)
+        self.bucket = TokenBucket(rate, burst)
+        self.max_retries = max_retries
+        self.retry_budget = retry_budget
+        self.timeout = timeout
+        self.usage_parser = usage_parser
+        self.throttle_check = throttle_check
+        self.session = session or requests.Session()
+        self._lock = threading.Lock()
+        self.usage_factor = 1.0
+        self.throttle_factor = 1.0
+
+    # -----------------------------------------------------------------
+    # rate adaptation
+    # -----------------------------------------------------------------
+    def _apply_rate(self):
+        if self.base_rate > 0:
+            self.bucket.set_rate(self.base_rate * min(self.usage_factor, self.throttle_factor))
+
+    def _observe_usage(self, response):
+        if not self.usage_parser:
+            return
+        usage, regain = self.usage_parser(response)
+        if usage is None:
+            return
+        with self._lock:
+            if usage <= USAGE_SOFT_LIMIT:
+                self.usage_factor = 1.0
+            else:
+                self.usage_factor = max((100.0 - usage) / (100.0 - USAGE_SOFT_LIMIT), MIN_RATE_FACTOR)
+            self._apply_rate()
+        if regain:
+            warn("⏸ %s API usage %.0f%%, pausing requests for %.0fs", self.channel, usage, regain)
+            self.bucket.pause(regain)
+
+    def _on_throttled(self):
+        with self._lock:
+            self.throttle_factor = max(self.throttle_factor / 2, MIN_RATE_FACTOR)
+            self._apply_rate()
+        incr("http_throttled", channel=self.channel)
+
+    def _on_success(self):
+        if self.throttle_factor >= 1.0:
+            return
+        with self._lock:
+            self.throttle_factor = min(self.throttle_factor + 0.1, 1.0)
+            self._apply_rate()
+
+    # -----------------------------------------------------------------
+    # retry
+    # -----------------------------------------------------------------
+    def _take_retry(self):
+        with self._lock:
+            if self.retry_budget <= 0:
+                return False
+            self.retry_budget -= 1
+            return True
+
+    def _backoff(self, attempt, response):
+        """Full jitter: uniform(0, base * 2^attempt), dibatasi HTTP_BACKOFF_MAX; Retry-After dihormati"""
+        delay = random.uniform(0, min(HTTP_BACKOFF_MAX, HTTP_BACKOFF_BASE * (2 ** attempt)))
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after:
+            try:
+                delay = max(delay, float(retry_after))
+            except ValueError:
+                pass
+        return min(delay, HTTP_BACKOFF_MAX)
+
+    def _is_throttled(self, response):
+        return response.status_code == 429 or bool(self.throttle_check and self.throttle_check(response))
+
+    def request(self, method, url, session=None, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        attempt = 0
+        while True:
+            self.bucket.acquire()
+            incr("http_requests", channel=self.channel)
+            response, exc = None, None
+            try:
+                response = (session or self.session).request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                exc = e
+
+            if response is not None:
+                self._observe_usage(response)
+                throttled = self._is_throttled(response)
+                if throttled:
+                    self._on_throttled()
+                elif response.status_code not in RETRY_STATUSES:
+                    self._on_success()
+                    return response
+
+            if attempt >= self.max_retries or not self._take_retry():
+                incr("http_retry_exhausted", channel=self.channel)
+                if exc is not None:
+                    raise exc
+                return response
+
+            delay = self._backoff(attempt, response)
+            reason = exc if exc is not None else f"HTTP {response.status_code}"
+            warn("🔁 %s request failed (%s), retry %d/%d in %.1fs", self.channel, reason, attempt + 1,
+                 self.max_retries, delay)
+            incr("http_retries", channel=self.channel)
+            time.sleep(delay)
+            attempt += 1
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+
+CHANNEL_CLIENTS = {
+    "facebook": lambda: HttpClient(
+        "facebook", FB_RATE_LIMIT, usage_parser=facebook_usage, throttle_check=facebook_throttled,
+    ),
+    "google": lambda: HttpClient("google", GOOGLE_RATE_LIMIT, throttle_check=google_throttled),
+    "traveloka": lambda: HttpClient("traveloka", TRAVELOKA_HTTP_RATE_LIMIT),
+}
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+def get_client(channel):
+    """Satu HttpClient per channel per proses (bucket + retry budget dipakai bersama semua thread)"""
+    with _clients_lock:
+        client = _clients.get(channel)
+        if client is None:
+            client = _clients[channel] = CHANNEL_CLIENTS[channel]()
+        return client
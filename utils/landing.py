@@ -0,0 +1,109 @@
+import atexit
+import gzip
+import itertools
+import json
+import os
+import threading
+from datetime import datetime, date
+from utils.logger import warn
+from config.settings import LANDING_ENABLED, LANDING_ZONE_PATH, LANDING_SEGMENT_RECORDS
+
+
+class LandingZone:
+    """
+    Landing zone append-only untuk raw response tiap channel:
+    <root>/<channel>/<YYYY-MM-DD>/<HHMMSS>-<pid>-<seq>.jsonl.gz
+    1 baris = 1 record {"landed_at", "channel", "kind", ..., "payload"}.
+    Satu segment terbuka per channel, dirotasi tiap segment_records record
+    atau saat tanggal berganti; segment yang sudah ditutup tidak pernah diubah.
+    """
+    def __init__(self, root=LANDING_ZONE_PATH, segment_records=LANDING_SEGMENT_RECORDS, enabled=LANDING_ENABLED):
+        self.root = root
+        self.segment_records = max(int(segment_records), 1)
+        self.enabled = enabled and bool(root)
+        self._open = {}  # channel -> (day, file, records_written)
+        self._seq = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def _segment_path(self, channel, day):
+        folder = os.path.join(self.root, channel, day)
+        os.makedirs(folder, exist_ok=True)
+        name = f"{datetime.now():%H%M%S}-{os.getpid()}-{next(self._seq):04d}.jsonl.gz"
+        return os.path.join(folder, name)
+
+    def land(self, channel, kind, payload, **meta):
+        """Tulis satu raw response; gagal tulis hanya di-log, tidak menghentikan ingestion"""
+        if not self.enabled:
+            return
+        now = datetime.now()
+        line = json.dumps(
+            {"landed_at": now.isoformat(timespec="seconds"), "channel": channel, "kind": kind, **meta,
+             "payload": payload},
+            ensure_ascii=False, default=str,
+        )
+        day = now.strftime("%Y-%m-%d")
+        try:
+            with self._lock:
+                current = self._open.get(channel)
+                if current and (current[0] != day or current[2] >= self.segment_records):
+                    current[1].close()
+                    current = None
+                if current is None:
+                    current = (day, gzip.open(self._segment_path(channel, day), "at", encoding="utf-8"), 0)
+                current[1].write(line + "\n")
+                self._open[channel] = (current[0], current[1], current[2] + 1)
+        except OSError as e:
+            warn("⚠ Landing zone write failed (%s/%s): %s", channel, kind, e)
+
+    def close(self, channel=None):
+        """Tutup segment terbuka (semua channel kalau channel=None)"""
+        with self._lock:
+            for name in [channel] if channel else list(self._open):
+                current = self._open.pop(name, None)
+                if current:
+                    current[1].close()
+
+    def segments(self, channel, since=None, until=None):
+        """Path segment channel, urut waktu; since/until = date (inklusif)"""
+        folder = os.path.join(self.root, channel)
+        if not os.path.isdir(folder):
+            return []
+        paths = []
+        for day in sorted(os.listdir(folder)):
+            try:
+                day_date = date.fromisoformat(day)
+            except ValueError:
+                continue
+            if (since and day_date < since) or (until and day_date > until):
+                continue
+            day_folder = os.path.join(folder, day)
+            paths += [os.path.join(day_folder, name) for name in sorted(os.listdir(day_folder))
+                      if name.endswith(".jsonl.gz")]
+        return paths
+
+    def iter_records(self, channel, since=None, until=None, kinds=None):
+        """Stream record dari disk, satu per satu; segment terpotong (crash) dibaca sampai batas yang utuh"""
+        for path in self.segments(channel, since, until):
+            try:
+                with gzip.open(path, "rt", encoding="utf-8") as f:
+                    for line in f:
+                        if not line.strip():
+                            continue
+                        try:
+                            record = json.loads(line)
+                        except ValueError:
+                            warn("⚠ Skipping corrupt landing record in %s", path)
+                            continue
+                        if kinds is None or record.get("kind") in kinds:
+                            yield record
+            except (EOFError, OSError) as e:
+                warn("⚠ Landing segment %s is truncated: %s", path, e)
+
+
+# singleton
+landing_zone = LandingZone()
+atexit.register(landing_zone.close)
+
+# Public wrapper
+def land(channel, kind, payload, **meta):
+    landing_zone.land(channel, kind, payload, **meta)
@@ -1,6 +1,11 @@
+import atexit
+import json
 import logging
+import logging.handlers
+import queue
 import sys
-from datetime import datetime
+import time
+from config.settings import LOG_MODE, LOG_LEVEL
 
 # --- Custom Formatter with Colors ---
 class ColorFormatter(logging.Formatter):
@@ -9,36 +14,95 @@ class ColorFormatter(logging.Formatter):
         'WARNING': '\033[93m',   # yellow
         'ERROR': '\033[91m',     # red
     }
+    EMOJIS = {
+        'INFO': "ℹ️ ",
+        'WARNING': "⚠️ ",
+        'ERROR': "❌",
+    }
     RESET = '\033[0m'
 
     def format(self, record):
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        emoji = {
-            'INFO': "ℹ️ ",
-            'WARNING': "⚠️ ",
-            'ERROR': "❌",
-        }.get(record.levelname, "")
-
+        timestamp = time.strftime("%H:%M:%S", time.localtime(record.created))
+        emoji = self.EMOJIS.get(record.levelname, "")
         color = self.COLORS.get(record.levelname, "")
         message = super().format(record)
 
         return f"[{timestamp}] {emoji} {color}{message}{self.RESET}"
 
 
+# --- Plain JSON Formatter (production, tanpa ANSI) ---
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(record.created))
+                  + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "msg": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
 # --- Setup Logger ---
 logger = logging.getLogger("omnichannel")
-logger.setLevel(logging.INFO)
+_listener = None
+
+
+def configure_logging(mode=LOG_MODE, level=LOG_LEVEL):
+    """
+    dev: ColorFormatter, ditulis langsung ke stdout.
+    production: JsonFormatter di belakang QueueHandler/QueueListener, jadi
+    thread pemanggil hanya enqueue record; format + write di thread listener.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+    for old in list(logger.handlers):
+        logger.removeHandler(old)
+
+    logger.setLevel(level)
+    logger.propagate = False
+
+    stream = logging.StreamHandler(sys.stdout)
+    if mode == "production":
+        stream.setFormatter(JsonFormatter())
+        records = queue.SimpleQueue()
+        _listener = logging.handlers.QueueListener(records, stream, respect_handler_level=True)
+        _listener.start()
+        logger.addHandler(logging.handlers.QueueHandler(records))
+    else:
+        stream.setFormatter(ColorFormatter("%(message)s"))
+        logger.addHandler(stream)
+
+
+def shutdown_logging():
+    """Flush record yang masih antre (production mode)"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+configure_logging()
+atexit.register(shutdown_logging)
+
+# Public wrappers: argumen %-style diformat lazy, hanya kalau level aktif
+def debug(msg, *args):
+    logger.debug(msg, *args)
 
-handler = logging.StreamHandler(sys.stdout)
-handler.setFormatter(ColorFormatter("%(message)s"))
-logger.addHandler(handler)
+def info(msg, *args):
+    logger.info(msg, *args)
 
-# Public wrappers
-def info(msg):
-    logger.info(msg)
+def warn(msg, *args):
+    logger.warning(msg, *args)
 
-def warn(msg):
-    logger.warning(msg)
+def error(msg, *args):
+    logger.error(msg, *args)
 
-def error(msg):
-    logger.error(msg)
+def is_debug():
+    """Guard untuk log per item yang mahal disiapkan"""
+    return logger.isEnabledFor(logging.DEBUG)
@@ -0,0 +1,142 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from config.settings import METRICS_JSON_PATH, METRICS_PROM_PATH
+
+
+class PipelineMetrics:
+    """
+    Timer + counter ringan per (channel, stage), aman dipakai banyak thread.
+    timer  -> count, total_seconds, max_seconds
+    counter -> value (items, http_requests, db_round_trips, ...)
+    Channel diambil dari argumen, atau dari bind_channel() di thread yang sama.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.timers = {}
+            self.counters = {}
+            self.started_at = time.time()
+
+    def current_channel(self):
+        return getattr(self._local, "channel", None) or "unknown"
+
+    @contextmanager
+    def bind_channel(self, channel):
+        """Label channel default untuk timer/incr di thread ini (dipakai utils.db, dsb)"""
+        previous = getattr(self._local, "channel", None)
+        self._local.channel = channel
+        try:
+            yield
+        finally:
+            self._local.channel = previous
+
+    def observe(self, stage, seconds, channel=None):
+        key = (channel or self.current_channel(), stage)
+        with self._lock:
+            entry = self.timers.setdefault(key, {"count": 0, "total_seconds": 0.0, "max_seconds": 0.0})
+            entry["count"] += 1
+            entry["total_seconds"] += seconds
+            entry["max_seconds"] = max(entry["max_seconds"], seconds)
+
+    @contextmanager
+    def timer(self, stage, channel=None):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - started, channel)
+
+    def incr(self, name, value=1, channel=None):
+        key = (channel or self.current_channel(), name)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def snapshot(self):
+        """{"channels": {channel: {"timers": {...}, "counters": {...}}}}"""
+        with self._lock:
+            channels = {}
+            for (channel, stage), entry in self.timers.items():
+                channels.setdefault(channel, {"timers": {}, "counters": {}})["timers"][stage] = {
+                    **entry,
+                    "total_seconds": round(entry["total_seconds"], 6),
+                    "max_seconds": round(entry["max_seconds"], 6),
+                }
+            for (channel, name), value in self.counters.items():
+                channels.setdefault(channel, {"timers": {}, "counters": {}})["counters"][name] = value
+            return {
+                "started_at": datetime.fromtimestamp(self.started_at).isoformat(timespec="seconds"),
+                "exported_at": datetime.now().isoformat(timespec="seconds"),
+                "channels": channels,
+            }
+
+    def to_prometheus(self):
+        """Format textfile collector (node_exporter --collector.textfile)"""
+        lines = [
+            "# HELP ingestion_stage_seconds_total Total time spent per stage.",
+            "# TYPE ingestion_stage_seconds_total counter",
+        ]
+        with self._lock:
+            timers = sorted(self.timers.items())
+            counters = sorted(self.counters.items())
+        for (channel, stage), entry in timers:
+            lines.append(f'ingestion_stage_seconds_total{{channel="{channel}",stage="{stage}"}} {entry["total_seconds"]:.6f}')
+        lines += [
+            "# HELP ingestion_stage_calls_total Number of timed calls per stage.",
+            "# TYPE ingestion_stage_calls_total counter",
+        ]
+        for (channel, stage), entry in timers:
+            lines.append(f'ingestion_stage_calls_total{{channel="{channel}",stage="{stage}"}} {entry["count"]}')
+        lines += [
+            "# HELP ingestion_stage_max_seconds Slowest single call per stage in the last run.",
+            "# TYPE ingestion_stage_max_seconds gauge",
+        ]
+        for (channel, stage), entry in timers:
+            lines.append(f'ingestion_stage_max_seconds{{channel="{channel}",stage="{stage}"}} {entry["max_seconds"]:.6f}')
+        lines += [
+            "# HELP ingestion_events_total Items, requests and DB round trips per channel.",
+            "# TYPE ingestion_events_total counter",
+        ]
+        for (channel, name), value in counters:
+            lines.append(f'ingestion_events_total{{channel="{channel}",name="{name}"}} {value}')
+        lines += [
+            "# HELP ingestion_last_run_timestamp_seconds Unix time of the last export.",
+            "# TYPE ingestion_last_run_timestamp_seconds gauge",
+            f"ingestion_last_run_timestamp_seconds {int(time.time())}",
+        ]
+        return "\n".join(lines) + "\n"
+
+    def export(self, json_path=METRICS_JSON_PATH, prom_path=METRICS_PROM_PATH):
+        """Tulis snapshot JSON + Prometheus textfile (atomik: tmp + os.replace)"""
+        written = []
+        for path, content in (
+            (json_path, lambda: json.dumps(self.snapshot(), indent=2, ensure_ascii=False)),
+            (prom_path, self.to_prometheus),
+        ):
+            if not path:
+                continue
+            folder = os.path.dirname(path)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(content())
+            os.replace(tmp_path, path)
+            written.append(path)
+        return written
+
+
+# singleton
+metrics = PipelineMetrics()
+
+# Public wrappers
+timer = metrics.timer
+incr = metrics.incr
+bind_channel = metrics.bind_channel